@@ -1,5 +1,6 @@
 import assignment2 as a2
 import os
+import pytest
 
 def test_read_employees():
     employees = a2.read_employees()
@@ -70,4 +71,189 @@ def test_create_minutes_list():
 def test_write_sorted_list():
     sorted_list = a2.write_sorted_list()
     assert sorted_list[0] == ("Jason Tucker","September 20, 1980")
-    assert os.access("./minutes.csv", os.F_OK) == True
\ No newline at end of file
+    assert os.access("./minutes.csv", os.F_OK) == True
+
+def test_employee_index():
+    assert a2.employee_index[3][0][0] == "3"
+    assert len(a2.employee_index) == 20
+
+def test_employee_find_many():
+    matches = a2.employee_find_many([5, "6", 999])
+    assert matches[0][0][0] == "5"
+    assert matches[1][0][0] == "6"
+    assert matches[2] == []
+
+def test_read_csv_batches():
+    stream = a2.read_csv_batches("../csv/minutes1.csv", batch_size=7, as_tuples=True)
+    assert stream["fields"] == ["Name", "Date"]
+    batches = list(stream["batches"])
+    assert len(batches[0]) == 7
+    assert sum(len(batch) for batch in batches) == 30
+    assert batches[0][1] == ("Tony Henderson","November 15, 1991")
+
+def test_read_csv_batches_materialize():
+    data = a2.read_csv_batches("../csv/employees.csv", materialize=True)
+    assert data["fields"] == a2.employees["fields"]
+    assert len(data["rows"]) == 20
+
+def test_minutes_from_batches():
+    streams = [a2.read_csv_batches(f"../csv/{name}", batch_size=4)["batches"]
+               for name in ("minutes1.csv", "minutes2.csv")]
+    minutes_set = a2.create_minutes_set(*streams)
+    assert minutes_set == a2.create_minutes_set()
+    minutes_list = a2.create_minutes_list([list(minutes_set)[:10], list(minutes_set)[10:]])
+    assert len(minutes_list) == 46
+    assert type(minutes_list[0][1]).__name__ == "datetime"
+    sorted_list = a2.write_sorted_list([minutes_list])
+    assert sorted_list[0] == ("Jason Tucker","September 20, 1980")
+
+def test_write_sorted_list_external(tmp_path):
+    output = tmp_path / "minutes.csv"
+    count = a2.write_sorted_list_external(output=output, run_size=5, tmp_dir=tmp_path)
+    assert count == 46
+    with open(output, newline="") as f:
+        lines = list(a2.csv.reader(f))
+    assert [tuple(row) for row in lines[1:]] == a2.write_sorted_list()
+    assert list(tmp_path.iterdir()) == [output]  # run files are cleaned up
+
+def test_parse_date():
+    import date_parse
+    assert date_parse.parse_date_fast("March 8, 1981") == a2.datetime(1981, 3, 8)
+    assert date_parse.parse_date("November 15, 1991") == a2.datetime.strptime("November 15, 1991", "%B %d, %Y")
+    for text in ("Smarch 8, 1981", "March 32, 1981", "8 March 1981",
+                 "March 8, 81", "March +8, 1981", "March 008, 1981"):
+        with pytest.raises(ValueError):
+            date_parse.parse_date_fast(text)
+
+def test_dedup_minutes():
+    import minutes_dedup
+    merged = minutes_dedup.dedup_minutes("../csv/minutes*.csv", workers=0)
+    assert merged["fields"] == ["Name", "Date"]
+    assert a2.create_minutes_set(merged["batches"]) == a2.create_minutes_set()
+    assert merged["stats"]["unique"] == 46
+    assert merged["stats"]["duplicates"] == 14
+
+def test_dedup_minutes_fingerprints():
+    import minutes_dedup
+    merged = minutes_dedup.dedup_minutes(["../csv/minutes1.csv", "../csv/minutes2.csv"],
+                                         workers=0, fingerprint_threshold=10)
+    rows = [row for batch in merged["batches"] for row in batch]
+    assert set(rows) == a2.create_minutes_set()
+    assert merged["stats"]["fingerprints"] == True
+
+def test_dedup_minutes_small_chunks():
+    import minutes_dedup
+    # 100-byte chunks: several batches per shard, 2 workers with at most 4 chunks in flight
+    merged = minutes_dedup.dedup_minutes("../csv/minutes*.csv", workers=2, chunk_bytes=100)
+    batches = list(merged["batches"])
+    assert len(batches) > merged["stats"]["shards"]
+    whole = minutes_dedup.dedup_minutes("../csv/minutes*.csv", workers=0)
+    assert [row for batch in batches for row in batch] == [row for batch in whole["batches"] for row in batch]
+    assert merged["stats"]["duplicates"] == 14
+
+def test_merge_minutes_files(tmp_path):
+    output = tmp_path / "merged.csv"
+    stats = a2.merge_minutes_files("../csv/minutes*.csv", output=output, workers=2)
+    assert stats["shards"] == 2
+    assert stats["unique"] == 46
+    with open(output, newline="") as f:
+        assert len(f.readlines()) == 47
+
+def test_column_index_unknown():
+    with pytest.raises(ValueError):
+        a2.column_index("salary")
+
+def test_employee_dict_projection():
+    dict_result = a2.employee_dict(a2.employees["rows"][0], fields=["last_name", "employee_id"])
+    assert dict_result == {"last_name": a2.employees["rows"][0][2]}
+
+def test_employee_records():
+    records = a2.employee_records(["employee_id", "first_name"])
+    assert len(records) == 20
+    assert records[0].first_name == a2.employees["rows"][0][1]
+    assert not hasattr(records[0], "__dict__")
+
+def test_all_employees_dict_cache():
+    first = a2.all_employees_dict()
+    assert a2.all_employees_dict() is first
+    projected = a2.all_employees_dict(["first_name"])
+    assert projected["9"] == {"first_name": "Phillip"}
+    a2.sort_by_last_name()
+    assert a2.all_employees_dict() is not first
+    assert a2.all_employees_dict() == first
+
+def test_columnar_employees():
+    table = a2.employees_columnar()
+    assert type(table["columns"]["employee_id"]).__name__ == "array"
+    assert a2.column_index("last_name", table=table) == 2
+    match = a2.employee_find(3, table=table)
+    assert match == a2.employee_find(3)
+    order = a2.sort_by_last_name(table=table)
+    assert len(order) == 20
+    assert a2.first_name(0, table=table) == a2.sort_by_last_name()[0][1]
+    assert list(a2.columnar.rows(table)) == a2.employees["rows"]
+
+def test_columnar_keeps_odd_ids():
+    table = a2.columnar.to_columnar({"fields": ["employee_id", "name"],
+                                     "rows": [["007", "Bond"], ["x", "Nobody"]]})
+    assert table["columns"]["employee_id"] == ["007", "x"]
+    assert a2.columnar.find(table, 7) == [["007", "Bond"]]
+
+def test_diary_write_lines(tmp_path):
+    import diary
+    path = tmp_path / "diary.txt"
+
+    def lines(seen):
+        # before each new line, note what has reached the file so far
+        for line in ["  first  ", "second", "third", "done for now", "never written"]:
+            seen.append(path.read_text() if path.exists() else "")
+            yield line
+
+    one, two, three = "first\n", "first\nsecond\n", "first\nsecond\nthird\n"
+    for flush, every, expected in [("line", 1, ["", one, two, three]),
+                                   ("every", 2, ["", "", two, two]),
+                                   ("interval", 1, ["", one, two, three]),
+                                   ("exit", 1, ["", "", "", ""])]:
+        path.unlink(missing_ok=True)
+        seen = []
+        count, _ = diary.write_lines(lines(seen), path=path, flush=flush, every=every, interval=0)
+        assert count == 4
+        assert seen == expected
+        assert path.read_text() == "first\nsecond\nthird\ndone for now\n"
+
+def test_diary_every_must_be_positive():
+    import diary
+    with pytest.raises(ValueError):
+        diary.write_lines(["x"], path=os.devnull, flush="every", every=0)
+    with pytest.raises(SystemExit):
+        diary.parse_args(["--batch", "--every", "0"])
+
+def test_employee_find_sees_appended_row():
+    rows = a2.employees["rows"]
+    new_row = ["21"] + [""] * (len(a2.employees["fields"]) - 1)
+    try:
+        assert a2.employee_find(21) == []
+        rows.append(new_row)
+        assert a2.employee_find(21) == [new_row]
+        assert a2.employee_find_2("21") == [new_row]
+        assert "21" in a2.all_employees_dict()
+    finally:
+        rows.remove(new_row)
+        a2.employees_changed()
+    assert a2.employee_find(21) == []
+
+def test_edit_in_place_needs_employees_changed():
+    row = a2.employees["rows"][0]
+    idx = a2.column_index("first_name")
+    old_name = row[idx]
+    emp_id = row[a2.employee_id_column]
+    try:
+        a2.all_employees_dict()
+        row[idx] = "Renamed"
+        # same length, same list: the cached dict can't tell
+        assert a2.all_employees_dict()[emp_id]["first_name"] == old_name
+        a2.employees_changed()
+        assert a2.all_employees_dict()[emp_id]["first_name"] == "Renamed"
+    finally:
+        row[idx] = old_name
+        a2.employees_changed()
@@ -4,7 +4,46 @@ import traceback
 import sys
 import os
 import custom_module
+import external_sort
+import date_parse
+import minutes_dedup
+import columnar
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
+
+
+# Streaming CSV reader: rows come out in fixed-size batches
+def read_csv_batches(path, batch_size=1000, as_tuples=False, materialize=False):
+    """
+    Open a CSV file and return a dict with:
+      - "fields": list of column headers
+      - "batches": generator yielding lists of at most batch_size rows
+    Only one batch is kept in memory at a time, so big files are fine.
+    With materialize=True the batches are collected and the dict has
+    "fields" and "rows" instead (same shape as read_employees returns).
+    """
+    f = open(path, "r", newline="")
+    reader = csv.reader(f)
+    fields = next(reader, [])  # first row is headers
+
+    def batches():
+        # the file is closed when the generator finishes or is closed
+        with f:
+            batch = []
+            for row in reader:
+                batch.append(tuple(row) if as_tuples else row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    if materialize:
+        return {"fields": fields, "rows": list(chain.from_iterable(batches()))}
+    return {"fields": fields, "batches": batches()}
+
 
 def read_employees():
     """
@@ -12,21 +51,8 @@ def read_employees():
       - "fields": list of column headers
       - "rows": list of data rows (each row is a list of strings)
     """
-    data = {}
-    rows = []
-
     try:
-        # Open the CSV file for reading
-        with open("../csv/employees.csv", "r", newline="") as f:
-            reader = csv.reader(f)
-            for idx, row in enumerate(reader):
-                if idx == 0:
-                    data["fields"] = row  # first row is headers
-                else:
-                    rows.append(row) # remaining rows are data
-
-        data["rows"] = rows
-        return data
+        return read_csv_batches("../csv/employees.csv", materialize=True)
 
     except Exception as e:
         # Detailed error output
@@ -48,93 +74,241 @@ def read_employees():
 employees = read_employees()  # run the function to read the file
 
 
+def build_employee_index(rows):
+    """
+    Build a hash index for the given rows.
+    Keys: employee_id (int). Values: list of matching rows, in row order.
+    Rows with a garbage employee_id are left out, just like employee_find skips them.
+    """
+    idx = employees["fields"].index("employee_id")
+    index = {}
+    for row in rows:
+        try:
+            emp_id = int(row[idx])
+        except (ValueError, IndexError):
+            continue
+        index.setdefault(emp_id, []).append(row)
+    return index
+
+employee_index = build_employee_index(employees["rows"])  # built once, when the file is loaded
+
+
 # Task 3: Find the Column Index
-def column_index(column_name):
-    return employees["fields"].index(column_name)
+def build_column_map(fields):
+    """Map each column name to its position, so lookups don't scan the header list."""
+    return {name: i for i, name in enumerate(fields)}
+
+column_map = build_column_map(employees["fields"])
+
+
+def column_index(column_name, table=None):
+    if table is not None:
+        return columnar.column_index(table, column_name)
+    try:
+        return column_map[column_name]
+    except KeyError:
+        # same error list.index gave before
+        raise ValueError(f"{column_name!r} is not in list") from None
+
+
+# bumped every time employees["rows"] changes, so cached results know they are stale
+employees_version = 0
+employee_cache = {"state": None, "results": {}}
+
+
+def employees_state():
+    """
+    What the cached index and dicts were built from. Appending, removing or
+    replacing the whole rows list changes it on its own; editing a row in place
+    (rows[0][1] = ..., rows[0] = [...]) doesn't, so call employees_changed() after that.
+    """
+    rows = employees["rows"]
+    return (employees_version, id(rows), len(rows))
+
+
+employee_index_state = {"state": employees_state()}
+
+
+def current_employee_index():
+    """employee_index, rebuilt first if employees["rows"] changed since it was built."""
+    state = employees_state()
+    if employee_index_state["state"] != state:
+        employee_index.clear()
+        employee_index.update(build_employee_index(employees["rows"]))
+        employee_index_state["state"] = state
+    return employee_index
+
+
+def employees_changed():
+    """
+    Call after changing employees["rows"] or employees["fields"] by hand
+    (needed for edits in place, see employees_state).
+    Rebuilds the column map and the id index and drops cached results.
+    """
+    global employees_version
+    employees_version += 1
+    column_map.clear()
+    column_map.update(build_column_map(employees["fields"]))
+    employee_index.clear()
+    employee_index.update(build_employee_index(employees["rows"]))
+    employee_index_state["state"] = employees_state()
+    employee_cache["results"].clear()
 
 
 employee_id_column = column_index("employee_id")
 
+
+def employees_columnar():
+    """
+    Columnar copy of employees: array('q') for employee_id, interned strings
+    for the other fields. Pass it as table= to column_index, first_name,
+    employee_find and sort_by_last_name.
+    """
+    return columnar.to_columnar(employees)
+
+
 # Task 4: Find the Employee First Name
 
-def first_name(row_number):
-    """Return the first_name value from employees['rows'][row_number]."""
+def first_name(row_number, table=None):
+    """
+    Return the first_name value from employees['rows'][row_number].
+    With a columnar table (see employees_columnar), read it from there instead.
+    """
+    if table is not None:
+        return columnar.value(table, row_number, "first_name")
     idx = column_index("first_name")
     return employees["rows"][row_number][idx]
 
 # Task 5: Find the Employee: a Function in a Function
-def employee_find(employee_id):
+def employee_find(employee_id, table=None):
     """
     Return a list of rows whose employee_id equals the given employee_id (int-like).
-    Uses an inner function + filter().
+    Looks the id up in employee_index, so each call is O(1) instead of a full scan
+    (the index is rebuilt when rows are added or removed, see employees_state).
+    With a columnar table, the rows are rebuilt from its columns.
     """
-    # inner function — sees employee_id from outside
-    def employee_match(row):
-        try:
-            return int(row[employee_id_column]) == int(employee_id)
-        except ValueError:
-            # if garbage appears in the csv in id — just don't match such a row
-            return False
-
-    matches = list(filter(employee_match, employees["rows"]))
-    return matches
+    try:
+        target = int(employee_id)
+    except ValueError:
+        # if garbage is passed as id — nothing can match
+        return []
+    if table is not None:
+        return columnar.find(table, target)
+    # copy, so callers can't change the index by changing the result
+    return list(current_employee_index().get(target, []))
 
 
 # Task 6: Find the Employee with a Lambda
 def employee_find_2(employee_id):
     # convert to int just in case, so '1' and 1 work the same
     target = int(employee_id)
-    matches = list(filter(lambda row: int(row[employee_id_column]) == target, employees["rows"]))
+    matches = list(current_employee_index().get(target, []))
     return matches
 
 
+def employee_find_many(ids):
+    """
+    Batch version of employee_find.
+    Returns a list with one list of matching rows per id, in the same order as ids.
+    """
+    return [employee_find(employee_id) for employee_id in ids]
+
+
 # Task 7: Sort the Rows by last_name Using a Lambda
-def sort_by_last_name():
+def sort_by_last_name(table=None):
     """
     Sort employees['rows'] in place by the 'last_name' column and return the sorted rows.
+    With a columnar table, only its permutation index is rebuilt and returned.
     """
+    if table is not None:
+        return columnar.sort_by(table, "last_name")
     idx = column_index("last_name")
     employees["rows"].sort(key=lambda row: row[idx])  # sorting
+    # rebuild the index (so duplicate ids keep the new row order) and drop cached dicts
+    employees_changed()
     return employees["rows"]
 sort_by_last_name()
 print(employees)
 
 # Task 8: Create a dict for  an Employee
-def employee_dict(row):
+def dict_columns(fields=None):
+    """
+    (header, position) pairs that employee_dict copies, worked out once per call
+    instead of once per row. employee_id is always skipped.
+    With fields given, only those columns are kept (column projection).
+    """
+    id_idx = column_index("employee_id")
+    names = employees["fields"] if fields is None else fields
+    return [(name, column_index(name)) for name in names if column_index(name) != id_idx]
+
+
+def employee_dict(row, fields=None, columns=None):
     """
     Build a dict for a single employee row.
-    Keys come from employees['fields'], values from row.
+    Keys come from employees['fields'] (or just `fields`), values from row.
     Skip the 'employee_id' field.
+    columns is a precomputed dict_columns() result, for callers doing many rows.
     """
-    headers = employees["fields"]
-    id_idx = column_index("employee_id")
+    if columns is None:
+        columns = dict_columns(fields)
+
+    # in case the row has fewer values than headers
+    row_len = len(row)
+    return {header: row[i] if i < row_len else "" for header, i in columns}
+
+
+@lru_cache(maxsize=32)
+def record_type(names):
+    """namedtuple class (no per-instance __dict__) for the given column names."""
+    return namedtuple("EmployeeRecord", names)
+
+
+def employee_records(fields=None):
+    """
+    Return employees["rows"] as EmployeeRecord namedtuples.
+    With fields given, records only hold those columns.
+    """
+    names = tuple(employees["fields"] if fields is None else fields)
+    record = record_type(names)
+    positions = [column_index(name) for name in names]
+    return [record._make(row[i] if i < len(row) else "" for i in positions)
+            for row in employees["rows"]]
 
-    result = {}
-    for i, header in enumerate(headers):
-        if i == id_idx:
-            continue  # skip employee_id
-        # in case the row has fewer values than headers
-        result[header] = row[i] if i < len(row) else ""
-    return result
 
 # Task 9: A dict of dicts, for All Employees
-def all_employees_dict():
+def all_employees_dict(fields=None):
     """
     Build and return a dict-of-dicts for all employees.
     Keys: employee_id (int).
     Values: dict from employee_dict(row) (без employee_id внутри).
+    With fields given, the inner dicts only hold those columns.
+    The result is cached until employees["rows"] changes, so callers
+    share one dict and must not modify it. Rows added, removed or a new rows
+    list are noticed; after editing a row in place, call employees_changed().
     """
+    rows = employees["rows"]
+    state = employees_state()
+    if employee_cache["state"] != state:
+        employee_cache["state"] = state
+        employee_cache["results"].clear()
+
+    cache_key = None if fields is None else tuple(fields)
+    if cache_key in employee_cache["results"]:
+        return employee_cache["results"][cache_key]
+
     idx_id = employee_id_column  # index of the employee_id column
+    columns = dict_columns(fields)
     result = {}
 
-    for row in employees["rows"]:
+    for row in rows:
         try:
             emp_id = row[idx_id]
         except (ValueError, TypeError, IndexError):
             # if garbage or incomplete row in CSV — skip
             continue
-        result[emp_id] = employee_dict(row)
+        result[emp_id] = employee_dict(row, columns=columns)
 
+    employee_cache["results"][cache_key] = result
     return result
 
 
@@ -162,21 +336,10 @@ def read_csv_file(filename):
       - "fields": list of column headers  
       - "rows": list of data rows (each row converted to a tuple)
     """
-    data = {}
-    rows = []
-    
     try:
         csv_path = os.path.join(os.path.dirname(__file__), "..", "csv", filename)
-        with open(csv_path, "r", newline="") as file:
-            reader = csv.reader(file)
-            for idx, row in enumerate(reader):
-                if idx == 0:
-                    data["fields"] = row  # first row is headers
-                else:
-                    rows.append(tuple(row))  # convert each row to a tuple
-        
-        data["rows"] = rows
-        return data
+        # convert each row to a tuple
+        return read_csv_batches(csv_path, as_tuples=True, materialize=True)
         
     except Exception as e:
         # Detailed error output
@@ -213,12 +376,21 @@ minutes1, minutes2 = read_minutes()
 
 
 # Task 13: Create minutes_set
-def create_minutes_set():
+def create_minutes_set(*batch_streams):
     """
     Create two sets from the rows of minutes1 and minutes2 dicts.
     Combine them into one single set (union operation).
     Returns the resulting set.
+    If batch streams are given (e.g. read_csv_batches(...)["batches"]),
+    their rows are added to the set one batch at a time instead.
     """
+    if batch_streams:
+        combined_set = set()
+        for batches in batch_streams:
+            for batch in batches:
+                combined_set.update(tuple(row) for row in batch)
+        return combined_set
+
     # Convert rows to sets (rows are already tuples, which are hashable)
     set1 = set(minutes1["rows"])
     set2 = set(minutes2["rows"])
@@ -233,19 +405,42 @@ def create_minutes_set():
 minutes_set = create_minutes_set()
 
 
+# Task 13 for many shards: streaming dedup across any number of files
+def merge_minutes_files(sources, output="./minutes_merged.csv", workers=None,
+                        fingerprint_threshold=1_000_000):
+    """
+    Combine any number of minutes CSV files (paths or a glob pattern) into
+    output, keeping one copy of each row. Shards are parsed in a process pool
+    and unique rows are written as they stream in.
+    Returns the stats dict from minutes_dedup.dedup_minutes (duplicate count etc.).
+    """
+    merged = minutes_dedup.dedup_minutes(sources, workers=workers,
+                                         fingerprint_threshold=fingerprint_threshold)
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(merged["fields"])
+        for batch in merged["batches"]:
+            writer.writerows(batch)
+
+    return merged["stats"]
+
+
 # Task 14: Convert to datetime
-def create_minutes_list():
+def create_minutes_list(batches=None):
     """
     Create a list from minutes_set and convert date strings to datetime objects.
     Uses map() to convert each element into a tuple where:
     - First element: name (unchanged)
     - Second element: date string converted to datetime object
+    If batches (an iterable of row batches) is given, it is used instead of
+    minutes_set and rows are converted as they stream in.
     """
-    # Convert set to list
-    minutes_list_raw = list(minutes_set)
+    # Convert set to list (or just walk the batches lazily)
+    minutes_list_raw = list(minutes_set) if batches is None else chain.from_iterable(batches)
     
     # Use map with lambda to convert date strings to datetime objects
-    minutes_list_converted = list(map(lambda x: (x[0], datetime.strptime(x[1], "%B %d, %Y")), minutes_list_raw))
+    # (date_parse.parse_date caches repeated dates and skips strptime)
+    minutes_list_converted = list(map(lambda x: (x[0], date_parse.parse_date(x[1])), minutes_list_raw))
     
     return minutes_list_converted
 
@@ -255,14 +450,18 @@ minutes_list = create_minutes_list()
 
 
 # Task 15: Write Out Sorted List
-def write_sorted_list():
+def write_sorted_list(batches=None):
     """
     Sort minutes_list by datetime in ascending order, convert dates back to strings,
     and write the sorted data to ./minutes.csv file.
     Returns the converted list.
+    If batches (an iterable of batches of (name, datetime) rows) is given,
+    it is used instead of minutes_list.
     """
+    source = minutes_list if batches is None else chain.from_iterable(batches)
+
     # Sort minutes_list in ascending order of datetime (second element of each tuple)
-    sorted_list = sorted(minutes_list, key=lambda x: x[1])
+    sorted_list = sorted(source, key=lambda x: x[1])
     
     # Use map to convert datetime back to string format
     converted_list = list(map(lambda x: (x[0], x[1].strftime("%B %d, %Y")), sorted_list))
@@ -285,6 +484,36 @@ def write_sorted_list():
 sorted_minutes = write_sorted_list()
 
 
+# Task 15 for files larger than memory: external merge sort
+def write_sorted_list_external(batches=None, output="./minutes.csv", run_size=100_000,
+                               memory_budget=None, tmp_dir=None):
+    """
+    Same output as write_sorted_list, but rows are sorted with an external
+    merge sort: sorted runs of run_size rows (or memory_budget bytes) are
+    spilled to temporary files in tmp_dir and heap-merged into output.
+    batches is an iterable of batches of (name, datetime) rows; by default
+    minutes_list is used. Returns the number of rows written.
+    """
+    source = minutes_list if batches is None else chain.from_iterable(batches)
+
+    # ISO dates sort the same way as the datetimes, and they are plain strings for the run files
+    iso_rows = map(lambda x: (x[1].date().isoformat(), x[0]), source)
+    sorted_rows = external_sort.external_sort(
+        iso_rows, key=lambda x: x[0], run_size=run_size,
+        memory_budget=memory_budget, tmp_dir=tmp_dir,
+    )
+
+    count = 0
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(minutes1["fields"])
+        for iso_date, name in sorted_rows:
+            writer.writerow((name, datetime.fromisoformat(iso_date).strftime("%B %d, %Y")))
+            count += 1
+
+    return count
+
+
 if __name__ == "__main__":
     print("Task 2 → employees (raw):")
     print(employees)
@@ -0,0 +1,164 @@
+# Benchmarks for the assignment2 helpers
+# Run from the assignment2 folder: python benchmarks.py
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+import assignment2 as a2
+
+
+def make_employee_rows(count):
+    """Build `count` fake employee rows shaped like ../csv/employees.csv."""
+    return [[str(i), f"First{i}", f"Last{i % 997}", "+1 555-0100"] for i in range(1, count + 1)]
+
+
+def benchmark_employee_find(count=200_000, lookups=1_000):
+    """Compare the old filter() scan with the employee_index lookup."""
+    rows = make_employee_rows(count)
+    index = a2.build_employee_index(rows)
+    id_col = a2.employee_id_column
+    ids = [(i * 7919) % count + 1 for i in range(lookups)]
+
+    def indexed():
+        for employee_id in ids:
+            list(index.get(int(employee_id), []))
+
+    # the scan is slow, so time fewer lookups and scale up
+    scan_ids = ids[:10]
+    scan_time = timeit.timeit(
+        lambda: [list(filter(lambda row: int(row[id_col]) == e, rows)) for e in scan_ids],
+        number=1,
+    ) * (lookups / len(scan_ids))
+    index_time = timeit.timeit(indexed, number=1)
+
+    print(f"employee_find on {count} rows, {lookups} lookups:")
+    print(f"  scan    : {scan_time:.4f} s (estimated from {len(scan_ids)} lookups)")
+    print(f"  indexed : {index_time:.6f} s")
+    if index_time:
+        print(f"  speedup : {scan_time / index_time:.0f}x")
+
+
+
+def benchmark_date_parsing(count=200_000, distinct=5_000):
+    """strptime (the old create_minutes_list) vs fast path vs cached vs numpy."""
+    import date_parse
+    rng = random.Random(1)
+    start = datetime(1970, 1, 1)
+    pool = [(start + timedelta(days=rng.randrange(20_000))).strftime("%B %d, %Y")
+            for _ in range(distinct)]
+    texts = [rng.choice(pool) for _ in range(count)]
+
+    timings = {
+        "strptime": lambda: [datetime.strptime(t, "%B %d, %Y") for t in texts],
+        "fast path": lambda: [date_parse.parse_date_fast(t) for t in texts],
+        "cached": lambda: [date_parse.parse_date(t) for t in texts],
+    }
+    if date_parse.np is not None:
+        timings["numpy"] = lambda: date_parse.parse_dates_numpy(texts)
+
+    print(f"date parsing, {count} strings, {distinct} distinct:")
+    for name, func in timings.items():
+        date_parse.parse_date.cache_clear()
+        seconds = timeit.timeit(func, number=1)
+        print(f"  {name:9} : {seconds:.4f} s")
+    if date_parse.np is None:
+        print("  numpy     : skipped (numpy not installed)")
+
+
+def benchmark_columnar(count=200_000):
+    """Memory and last_name sort time: list-of-rows vs the columnar table."""
+    def measure(build):
+        tracemalloc.start()
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return result, size
+
+    # build the row strings fresh, the way csv.reader would, so both sides pay for them
+    rows, rows_size = measure(lambda: make_employee_rows(count))
+    data = {"fields": a2.employees["fields"], "rows": rows}
+    table, table_size = measure(lambda: a2.columnar.to_columnar(data))
+    # the columnar table still shares row strings with `rows`; count its own strings too
+    table_size += sum(sys.getsizeof(v) for name, column in table["columns"].items()
+                      if not isinstance(column, a2.columnar.array) for v in set(column))
+
+    last = a2.column_index("last_name")
+    rows_sort = timeit.timeit(lambda: sorted(rows, key=lambda row: row[last]), number=3) / 3
+    table_sort = timeit.timeit(lambda: a2.columnar.sort_by(table, "last_name"), number=3) / 3
+
+    print(f"employees storage, {count} rows:")
+    print(f"  rows     : {rows_size / 2**20:7.1f} MB, sort {rows_sort:.3f} s")
+    print(f"  columnar : {table_size / 2**20:7.1f} MB, sort {table_sort:.3f} s")
+
+
+def make_minutes_rows(count, seed=0):
+    """Yield `count` random (name, datetime) rows without keeping them in memory."""
+    rng = random.Random(seed)
+    start = datetime(1970, 1, 1)
+    for i in range(count):
+        yield (f"Person {i}", start + timedelta(days=rng.randrange(20_000)))
+
+
+def external_sort_child(count, mode):
+    """Sort `count` rows in this process and print its peak RSS in KB."""
+    fd, output = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        if mode == "external":
+            a2.write_sorted_list_external([make_minutes_rows(count)], output=output, run_size=50_000)
+        else:
+            rows = sorted(make_minutes_rows(count), key=lambda x: x[1])
+            with open(output, "w", newline="") as f:
+                writer = a2.csv.writer(f)
+                writer.writerows((name, date.strftime("%B %d, %Y")) for name, date in rows)
+    finally:
+        os.remove(output)
+    print(peak_rss_kb())
+
+
+def peak_rss_kb():
+    """
+    Peak RSS of this process in KB. On Linux ru_maxrss is carried over from the
+    parent through fork/exec, so a child started after a big benchmark would
+    report the parent's peak; VmHWM in /proc/self/status is reset on exec.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # elsewhere (macOS reports bytes, Linux KB)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def benchmark_external_sort(sizes=(100_000, 400_000, 1_600_000)):
+    """Peak RSS of the in-memory sort vs the external merge sort as input grows."""
+    print("write_sorted_list peak RSS (each run in a fresh process):")
+    print(f"  {'rows':>10} | {'in-memory':>12} | {'external':>12}")
+    for count in sizes:
+        peaks = []
+        for mode in ("memory", "external"):
+            result = subprocess.run(
+                [sys.executable, __file__, "external-sort-child", str(count), mode],
+                capture_output=True, text=True, check=True,
+            )
+            peaks.append(int(result.stdout.split()[-1]) // 1024)
+        print(f"  {count:>10} | {peaks[0]:>9} MB | {peaks[1]:>9} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["external-sort-child"]:
+        external_sort_child(int(sys.argv[2]), sys.argv[3])
+    else:
+        benchmark_employee_find()
+        benchmark_external_sort()
+        benchmark_date_parsing()
+        benchmark_columnar()
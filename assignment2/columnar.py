@@ -0,0 +1,118 @@
+# Columnar version of the {"fields", "rows"} employees structure
+# columnar.py
+import sys
+from array import array
+
+
+def int_column(values):
+    """
+    Pack a column of id strings into array('q').
+    Returns None if any value is not a plain integer that turns back into
+    the same string (e.g. "abc" or "007"), so the caller keeps strings instead.
+    """
+    packed = array("q")
+    try:
+        for value in values:
+            number = int(value)
+            if str(number) != value:
+                return None
+            packed.append(number)
+    except (ValueError, OverflowError):
+        return None
+    return packed
+
+
+def build_index(table):
+    """
+    Map id -> physical position, following the table's current order.
+    An id that shows up more than once maps to a list of positions instead,
+    so the common unique-id case doesn't pay for a list per row.
+    """
+    ids = table["columns"][table["id_field"]]
+    index = {}
+    for pos in table["order"]:
+        try:
+            key = int(ids[pos])
+        except ValueError:
+            # string ids that don't parse are skipped, like employee_find does
+            continue
+        found = index.get(key)
+        if found is None:
+            index[key] = pos
+        elif isinstance(found, list):
+            found.append(pos)
+        else:
+            index[key] = [found, pos]
+    return index
+
+
+def to_columnar(data, int_fields=("employee_id",), id_field="employee_id"):
+    """
+    Build a columnar table from a {"fields", "rows"} dict. Returns a dict with:
+      - "fields": list of column headers
+      - "columns": one array('q') per int field, one list of interned strings per other field
+      - "order": array('q') permutation of physical positions (the sort order)
+      - "index": id -> position(s) for find(), built on the first lookup
+    Sorting only rewrites "order"; the column data itself never moves.
+    """
+    fields = list(data["fields"])
+    rows = data["rows"]
+    columns = {}
+    for i, name in enumerate(fields):
+        # short rows get "" like employee_dict does
+        values = [row[i] if i < len(row) else "" for row in rows]
+        packed = int_column(values) if name in int_fields else None
+        columns[name] = packed if packed is not None else [sys.intern(v) for v in values]
+
+    table = {
+        "fields": fields,
+        "columns": columns,
+        "order": array("q", range(len(rows))),
+        "id_field": id_field,
+    }
+    table["index"] = None
+    return table
+
+
+def column_index(table, column_name):
+    """Position of column_name in table["fields"]."""
+    return table["fields"].index(column_name)
+
+
+def value(table, row_number, column_name):
+    """Value of one cell, row_number counted in the current sort order."""
+    return str(table["columns"][column_name][table["order"][row_number]])
+
+
+def row(table, pos):
+    """Rebuild the row at physical position pos as a list of strings."""
+    return [str(table["columns"][name][pos]) for name in table["fields"]]
+
+
+def rows(table):
+    """Yield all rows as lists of strings, in the current sort order."""
+    for pos in table["order"]:
+        yield row(table, pos)
+
+
+def find(table, employee_id):
+    """Rows whose id equals employee_id (int-like), like employee_find."""
+    if table["index"] is None:
+        table["index"] = build_index(table)
+    found = table["index"].get(int(employee_id))
+    if found is None:
+        return []
+    if isinstance(found, list):
+        return [row(table, pos) for pos in found]
+    return [row(table, found)]
+
+
+def sort_by(table, column_name):
+    """
+    Sort the table by column_name by building a new permutation in
+    table["order"]. Stable, like list.sort. Returns the new order.
+    """
+    column = table["columns"][column_name]
+    table["order"] = array("q", sorted(table["order"], key=column.__getitem__))
+    table["index"] = None  # duplicate ids follow the new order on the next lookup
+    return table["order"]
@@ -0,0 +1,55 @@
+# Fast parsing for the "%B %d, %Y" dates in the minutes files
+# date_parse.py
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only parse_dates_numpy needs it
+    np = None
+
+DATE_FORMAT = "%B %d, %Y"
+
+# month name -> month number, instead of letting strptime look it up every time
+MONTHS = {
+    "January": 1, "February": 2, "March": 3, "April": 4,
+    "May": 5, "June": 6, "July": 7, "August": 8,
+    "September": 9, "October": 10, "November": 11, "December": 12,
+}
+
+
+def parse_date_fast(text):
+    """
+    Parse a date like "March 8, 1981" without strptime.
+    Anything that doesn't look like that falls back to strptime,
+    so bad input still raises the same ValueError.
+    """
+    try:
+        month_name, day, year = text.split(" ")
+        day = day[:-1] if day.endswith(",") else ""
+        # only plain digits, as many as strptime takes: int() alone would also
+        # accept "+8", " 8" or a two-digit year
+        if 1 <= len(day) <= 2 and day.isdigit() and len(year) == 4 and year.isdigit():
+            return datetime(int(year), MONTHS[month_name], int(day))
+    except (ValueError, KeyError):
+        pass
+    return datetime.strptime(text, DATE_FORMAT)
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text):
+    """parse_date_fast with a memo cache: the minutes files repeat the same dates a lot."""
+    return parse_date_fast(text)
+
+
+def parse_dates_numpy(texts):
+    """
+    Parse a sequence of date strings into a numpy datetime64[D] array.
+    Each distinct string is parsed only once.
+    """
+    if np is None:
+        raise ImportError("parse_dates_numpy needs numpy (pip install numpy)")
+    unique, inverse = np.unique(np.asarray(texts, dtype=object), return_inverse=True)
+    parsed = np.array([parse_date_fast(text).date().isoformat() for text in unique],
+                      dtype="datetime64[D]")
+    return parsed[inverse]
@@ -1,6 +1,29 @@
 # Task 1: Diary
+import argparse
+import os
+import sys
+import time
 import traceback
 
+FLUSH_POLICIES = ("line", "every", "interval", "exit")
+
+
+def print_exception(e):
+    trace_back = traceback.extract_tb(e.__traceback__)
+    stack_trace = []
+    for trace in trace_back:
+        stack_trace.append(
+            f"File : {trace[0]} , Line : {trace[1]}, Func.Name : {trace[2]}, Message : {trace[3]}"
+        )
+
+    print("An exception occurred.")
+    print(f"Exception type: {type(e).__name__}")
+    message = str(e)
+    if message:
+        print(f"Exception message: {message}")
+    print(f"Stack trace: {stack_trace}")
+
+
 def main():
     try:
         first_prompt = True
@@ -15,25 +38,116 @@ def main():
 
                 f.write(line + "\n") # Write the line immediately, always with a newline
 
-                if line == "done for now": # Stop when the special line is received 
+                if line == "done for now": # Stop when the special line is received
                     break
 
     except Exception as e:
-        trace_back = traceback.extract_tb(e.__traceback__)
-        stack_trace = []
-        for trace in trace_back:
-            stack_trace.append(
-                f"File : {trace[0]} , Line : {trace[1]}, Func.Name : {trace[2]}, Message : {trace[3]}"
-            )
+        print_exception(e)
 
-        print("An exception occurred.")
-        print(f"Exception type: {type(e).__name__}")
-        message = str(e)
-        if message:
-            print(f"Exception message: {message}")
-        print(f"Stack trace: {stack_trace}")
 
+def write_lines(lines, path="diary.txt", buffer_size=1024 * 1024, flush="exit",
+                every=1000, interval=1.0, fsync=False):
+    """
+    Append lines to the diary through a buffer of buffer_size bytes.
+    flush decides when the buffer is pushed to the OS:
+      - "line": after every line (safest, slowest)
+      - "every": after every `every` lines
+      - "interval": when `interval` seconds have passed since the last flush
+      - "exit": only when the file is closed (fastest)
+    With fsync=True every flush is also fsynced, so it survives a power loss.
+    Lines are stripped like in main(), and "done for now" still ends the diary.
+    Returns (lines written, seconds taken).
+    """
+    if flush not in FLUSH_POLICIES:
+        raise ValueError(f"flush must be one of {FLUSH_POLICIES}, not {flush!r}")
+    if flush == "every" and every < 1:
+        raise ValueError(f"every must be at least 1, not {every}")
 
-if __name__ == "__main__":
-    main()
+    count = 0
+    start = time.perf_counter()
+    last_flush = start
+
+    with open(path, "a", encoding="utf-8", buffering=buffer_size) as f:
+        def flush_now():
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+        for line in lines:
+            line = line.strip()
+            f.write(line + "\n")
+            count += 1
+
+            if flush == "line":
+                flush_now()
+            elif flush == "every" and count % every == 0:
+                flush_now()
+            elif flush == "interval":
+                now = time.perf_counter()
+                if now - last_flush >= interval:
+                    flush_now()
+                    last_flush = now
+
+            if line == "done for now":
+                break
+
+        flush_now()  # every policy ends with the data on disk
+
+    return count, time.perf_counter() - start
 
+
+def read_stdin_lines(chunk_size=1024 * 1024):
+    """Read stdin in chunks of about chunk_size bytes and yield its lines."""
+    while True:
+        chunk = sys.stdin.readlines(chunk_size)
+        if not chunk:
+            return
+        yield from chunk
+
+
+def batch_main(args):
+    """Non-interactive mode: write everything from stdin and report lines/sec."""
+    try:
+        count, seconds = write_lines(
+            read_stdin_lines(), path=args.file, buffer_size=args.buffer_size,
+            flush=args.flush, every=args.every, interval=args.interval, fsync=args.fsync,
+        )
+        rate = count / seconds if seconds else float("inf")
+        # report on stderr so stdout stays clean for pipes
+        print(f"{count} lines in {seconds:.3f} s ({rate:,.0f} lines/sec, flush={args.flush}, "
+              f"fsync={args.fsync})", file=sys.stderr)
+    except Exception as e:
+        print_exception(e)
+
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write lines to diary.txt.")
+    parser.add_argument("--batch", action="store_true",
+                        help="read lines from stdin instead of prompting")
+    parser.add_argument("--file", default="diary.txt", help="diary file to append to")
+    parser.add_argument("--buffer-size", type=int, default=1024 * 1024,
+                        help="write buffer size in bytes")
+    parser.add_argument("--flush", choices=FLUSH_POLICIES, default="exit",
+                        help="when to flush the buffer")
+    parser.add_argument("--every", type=positive_int, default=1000,
+                        help="lines between flushes for --flush every")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between flushes for --flush interval")
+    parser.add_argument("--fsync", action="store_true", help="fsync after every flush")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        batch_main(args)
+    else:
+        main()
@@ -0,0 +1,70 @@
+# External merge sort for row data that does not fit in memory
+# external_sort.py
+import csv
+import heapq
+import os
+import sys
+import tempfile
+
+
+def row_size(row):
+    """Rough number of bytes a row of strings takes in memory."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+
+def write_run(rows, tmp_dir=None):
+    """Write already sorted rows to a temporary CSV file and return its path."""
+    fd, path = tempfile.mkstemp(prefix="run_", suffix=".csv", dir=tmp_dir)
+    with os.fdopen(fd, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def read_run(path):
+    """Yield the rows of a run file back as tuples."""
+    with open(path, "r", newline="") as f:
+        for row in csv.reader(f):
+            yield tuple(row)
+
+
+def external_sort(rows, key, run_size=100_000, memory_budget=None, tmp_dir=None):
+    """
+    Sort rows (tuples of strings) by key and yield them in order.
+    Rows are collected into runs of at most run_size rows (or memory_budget
+    bytes, if given), each run is sorted and spilled to a temporary file,
+    then all runs are merged with a heap. Equal keys keep their input order.
+    If everything fits into a single run, nothing is written to disk.
+    """
+    run_paths = []
+    run = []
+    run_bytes = 0
+    try:
+        for row in rows:
+            run.append(row)
+            if memory_budget is not None:
+                run_bytes += row_size(row)
+            if len(run) >= run_size or (memory_budget is not None and run_bytes >= memory_budget):
+                run.sort(key=key)
+                run_paths.append(write_run(run, tmp_dir))
+                run = []
+                run_bytes = 0
+
+        run.sort(key=key)
+        if not run_paths:
+            # small input: plain in-memory sort
+            yield from run
+            return
+
+        if run:
+            run_paths.append(write_run(run, tmp_dir))
+            run = []
+
+        # heapq.merge takes equal items from earlier runs first, so the sort stays stable
+        yield from heapq.merge(*(read_run(path) for path in run_paths), key=key)
+
+    finally:
+        for path in run_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,166 @@
+# Deduplicate rows across any number of minutes CSV shards
+# minutes_dedup.py
+import csv
+import glob
+import hashlib
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def expand_sources(sources):
+    """
+    Turn sources into a list of file paths.
+    sources can be one path, one glob pattern (e.g. "../csv/minutes*.csv"),
+    or a list of paths and patterns. Patterns are expanded in sorted order.
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        source = str(source)
+        if glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source)))
+        else:
+            paths.append(source)
+    return paths
+
+
+def shard_chunks(path, chunk_bytes):
+    """
+    Return (fields, byte ranges) for a shard: its data lines split into
+    (start, end) ranges of about chunk_bytes, each ending at a line end.
+    """
+    with open(path, "rb") as f:
+        fields = next(csv.reader([f.readline().decode("utf-8")]), [])
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        start = f.tell()
+        while start < size:
+            if start + chunk_bytes >= size:
+                end = size
+            else:
+                f.seek(start + chunk_bytes - 1)
+                f.readline()  # on to the end of that line
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return fields, ranges
+
+
+def read_chunk(path, start, end, columns):
+    """
+    Read one byte range of a shard (in a worker process). Returns the rows as tuples.
+    A row with the wrong number of fields means a quoted field with a newline
+    in it was cut in two, so that raises ValueError.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode("utf-8")
+    rows = []
+    for row in csv.reader(io.StringIO(data, newline="")):
+        if not row:
+            continue
+        if len(row) != columns:
+            raise ValueError(f"{path}: a row in bytes {start}-{end} has {len(row)} fields, "
+                             f"not {columns} (a newline inside a quoted field?)")
+        rows.append(tuple(row))
+    return rows
+
+
+def row_fingerprint(row):
+    """64-bit hash of a row. Stable between processes, unlike hash() on strings."""
+    digest = hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def dedup_minutes(sources, workers=None, fingerprint_threshold=1_000_000, chunk_bytes=1024 * 1024):
+    """
+    Stream the rows of all shards and keep only the first copy of each row.
+    Shards are cut into chunks of about chunk_bytes, parsed in a process pool
+    of `workers` processes (None: one per CPU; 0 parses them in this process)
+    with at most 2 * workers chunks in flight, so parsed rows don't pile up
+    while the dedup loop catches up. Returns a dict with:
+      - "fields": headers of the first shard
+      - "batches": generator yielding one batch of new, unique rows per chunk
+      - "stats": dict with shards / rows / unique / duplicates / fingerprints,
+        filled in while the batches are consumed
+    Seen rows are kept in one set; once it grows past fingerprint_threshold
+    it is replaced by a set of 64-bit fingerprints to save memory (a hash
+    collision could then drop a row, which is very unlikely at this size).
+    """
+    paths = expand_sources(sources)
+    stats = {"shards": len(paths), "rows": 0, "unique": 0, "duplicates": 0, "fingerprints": False}
+    result = {"fields": [], "batches": None, "stats": stats}
+
+    if not paths:
+        result["batches"] = iter(())
+        return result
+
+    # the header is needed up front, the rows of the first shard are read again below
+    with open(paths[0], "r", newline="") as f:
+        result["fields"] = next(csv.reader(f), [])
+
+    def batches():
+        seen = set()
+        use_fingerprints = False
+
+        def jobs():
+            for path in paths:
+                fields, ranges = shard_chunks(path, chunk_bytes)
+                for start, end in ranges:
+                    yield path, start, end, len(fields)
+
+        if workers == 0:
+            executor = None
+            chunks = (read_chunk(*job) for job in jobs())
+        else:
+            pool_size = workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=pool_size)
+            chunks = bounded_results(executor, jobs(), 2 * pool_size)
+
+        try:
+            for rows in chunks:
+                new_rows = []
+                for row in rows:
+                    key = row_fingerprint(row) if use_fingerprints else row
+                    if key in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    new_rows.append(row)
+
+                    if not use_fingerprints and len(seen) > fingerprint_threshold:
+                        seen = {row_fingerprint(r) for r in seen}
+                        use_fingerprints = True
+                        stats["fingerprints"] = True
+
+                stats["rows"] += len(rows)
+                stats["unique"] += len(new_rows)
+                if new_rows:
+                    yield new_rows
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    result["batches"] = batches()
+    return result
+
+
+def bounded_results(executor, jobs, max_in_flight):
+    """
+    Yield read_chunk results of jobs in order (so "first copy wins" is
+    deterministic), keeping at most max_in_flight chunks submitted and not yet taken.
+    """
+    pending = deque()
+    jobs = iter(jobs)
+    while True:
+        while len(pending) < max_in_flight:
+            job = next(jobs, None)
+            if job is None:
+                break
+            pending.append(executor.submit(read_chunk, *job))
+        if not pending:
+            return
+        yield pending.popleft().result()
@@ -1,10 +1,18 @@
+import json
+import os
 import sqlite3
+import sys
+from collections import OrderedDict
+from itertools import islice
+
+# connection_pool.py lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import connection_pool
 
 # Connect to SQLite database
 try:
     # Connect to the database (creates it if it doesn't exist)
-    conn = sqlite3.connect('../db/magazines.db')
-    conn.execute("PRAGMA foreign_keys = 1")
+    conn = connection_pool.connect('../db/magazines.db')  # foreign_keys is turned on for us
     print("Successfully connected to the database!")
     
     # Create a cursor object
@@ -65,27 +73,114 @@ try:
     except sqlite3.Error as e:
         print(f"Error creating subscriptions table: {e}")
     
+    # Unique indexes for the duplicate checks of add_subscriber and add_subscription,
+    # so the bulk loaders below can leave them to INSERT ... ON CONFLICT DO NOTHING
+    try:
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_subscribers_name_address
+            ON subscribers (name, address)
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_subscriptions_subscriber_magazine
+            ON subscriptions (subscriber_id, magazine_id)
+        ''')
+        print("Unique indexes created successfully.")
+    except sqlite3.Error as e:
+        print(f"Error creating unique indexes: {e}")
+
     # Commit the changes
     conn.commit()
     print("All changes committed to the database.")
     
+    # Id cache: the add_* functions look up the same few names and ids over and
+    # over, so the ids known to exist are kept here (least recently used dropped first).
+    # Keys are (table, "id", id) and (table, "name", name), the value is the id;
+    # for subscribers the name is a (name, address) tuple. Filled on lookup and
+    # on insert, and a row's entries are dropped when it is deleted.
+    ID_CACHE_SIZE = 10000
+    id_cache = OrderedDict()
+    # (table, id) -> the name key cached for it, so a delete finds its entries directly
+    id_cache_names = {}
+    id_cache_stats = {"hits": 0, "misses": 0}
+
+    # (query by id, query by name) for every table in the cache
+    id_queries = {
+        "publishers": ("SELECT publisher_id FROM publishers WHERE publisher_id = ?",
+                       "SELECT publisher_id FROM publishers WHERE name = ?"),
+        "magazines": ("SELECT magazine_id FROM magazines WHERE magazine_id = ?",
+                      "SELECT magazine_id FROM magazines WHERE name = ?"),
+        "subscribers": ("SELECT subscriber_id FROM subscribers WHERE subscriber_id = ?",
+                        "SELECT subscriber_id FROM subscribers WHERE name = ? AND address = ?"),
+    }
+
+    def cache_get(key):
+        if key in id_cache:
+            id_cache.move_to_end(key)
+            id_cache_stats["hits"] += 1
+            return id_cache[key]
+        id_cache_stats["misses"] += 1
+        return None
+
+    def cache_put(table, row_id, name=None):
+        """Remember that row_id exists in table (and that it is the id of name)."""
+        keys = [(table, "id", row_id)]
+        if name is not None:
+            keys.append((table, "name", name))
+            id_cache_names[(table, row_id)] = keys[1]
+        for key in keys:
+            id_cache[key] = row_id
+            id_cache.move_to_end(key)
+        while len(id_cache) > ID_CACHE_SIZE:
+            key, value = id_cache.popitem(last=False)
+            if key[1] == "name" and id_cache_names.get((key[0], value)) == key:
+                del id_cache_names[(key[0], value)]
+
+    def cache_forget(table, row_id):
+        """Drop the entries of a deleted row."""
+        id_cache.pop((table, "id", row_id), None)
+        name_key = id_cache_names.pop((table, row_id), None)
+        if name_key is not None and id_cache.get(name_key) == row_id:
+            del id_cache[name_key]
+
+    def id_exists(table, row_id):
+        """True if row_id is in table. Only asks the database on a cache miss."""
+        if cache_get((table, "id", row_id)) is not None:
+            return True
+        cursor.execute(id_queries[table][0], (row_id,))
+        if cursor.fetchone():
+            cache_put(table, row_id)
+            return True
+        return False
+
+    def find_id(table, name):
+        """The id of the row called name in table, or None. Only asks the database on a cache miss."""
+        row_id = cache_get((table, "name", name))
+        if row_id is not None:
+            return row_id
+        cursor.execute(id_queries[table][1], name if isinstance(name, tuple) else (name,))
+        result = cursor.fetchone()
+        if result:
+            cache_put(table, result[0], name)
+            return result[0]
+        return None
+
     # Define functions to add entries to tables
-    
+
     def add_publisher(name):
         """Add a publisher to the database. Returns publisher_id."""
         try:
             # Check if publisher already exists
-            cursor.execute("SELECT publisher_id FROM publishers WHERE name = ?", (name,))
-            result = cursor.fetchone()
+            result = find_id("publishers", name)
             
             if result:
-                print(f"Publisher '{name}' already exists with ID {result[0]}")
-                return result[0]
+                print(f"Publisher '{name}' already exists with ID {result}")
+                return result
             
             # Insert new publisher
             cursor.execute("INSERT INTO publishers (name) VALUES (?)", (name,))
             conn.commit()
             publisher_id = cursor.lastrowid
+            cache_put("publishers", publisher_id, name)
             print(f"Publisher '{name}' added with ID {publisher_id}")
             return publisher_id
             
@@ -97,16 +192,14 @@ try:
         """Add a magazine to the database. Returns magazine_id."""
         try:
             # Check if magazine already exists
-            cursor.execute("SELECT magazine_id FROM magazines WHERE name = ?", (name,))
-            result = cursor.fetchone()
+            result = find_id("magazines", name)
             
             if result:
-                print(f"Magazine '{name}' already exists with ID {result[0]}")
-                return result[0]
+                print(f"Magazine '{name}' already exists with ID {result}")
+                return result
             
             # Verify publisher exists
-            cursor.execute("SELECT publisher_id FROM publishers WHERE publisher_id = ?", (publisher_id,))
-            if not cursor.fetchone():
+            if not id_exists("publishers", publisher_id):
                 print(f"Error: Publisher with ID {publisher_id} does not exist")
                 return None
             
@@ -115,6 +208,7 @@ try:
                          (name, publisher_id))
             conn.commit()
             magazine_id = cursor.lastrowid
+            cache_put("magazines", magazine_id, name)
             print(f"Magazine '{name}' added with ID {magazine_id}")
             return magazine_id
             
@@ -127,21 +221,18 @@ try:
         Checks for duplicate name AND address combination."""
         try:
             # Check if subscriber with same name AND address already exists
-            cursor.execute(
-                "SELECT subscriber_id FROM subscribers WHERE name = ? AND address = ?", 
-                (name, address)
-            )
-            result = cursor.fetchone()
+            result = find_id("subscribers", (name, address))
             
             if result:
-                print(f"Subscriber '{name}' at '{address}' already exists with ID {result[0]}")
-                return result[0]
+                print(f"Subscriber '{name}' at '{address}' already exists with ID {result}")
+                return result
             
             # Insert new subscriber
             cursor.execute("INSERT INTO subscribers (name, address) VALUES (?, ?)", 
                          (name, address))
             conn.commit()
             subscriber_id = cursor.lastrowid
+            cache_put("subscribers", subscriber_id, (name, address))
             print(f"Subscriber '{name}' added with ID {subscriber_id}")
             return subscriber_id
             
@@ -164,16 +255,12 @@ try:
                 return result[0]
             
             # Verify subscriber exists
-            cursor.execute("SELECT subscriber_id FROM subscribers WHERE subscriber_id = ?", 
-                         (subscriber_id,))
-            if not cursor.fetchone():
+            if not id_exists("subscribers", subscriber_id):
                 print(f"Error: Subscriber with ID {subscriber_id} does not exist")
                 return None
             
             # Verify magazine exists
-            cursor.execute("SELECT magazine_id FROM magazines WHERE magazine_id = ?", 
-                         (magazine_id,))
-            if not cursor.fetchone():
+            if not id_exists("magazines", magazine_id):
                 print(f"Error: Magazine with ID {magazine_id} does not exist")
                 return None
             
@@ -191,6 +278,144 @@ try:
             print(f"Error adding subscription: {e}")
             return None
     
+    # Bulk versions of the functions above, for loading big lists.
+    # Each takes an iterable of records and works batch_size records at a time:
+    # one executemany INSERT ... ON CONFLICT DO NOTHING (the UNIQUE constraints do
+    # the duplicate checks), one query to look up the ids, and a single commit at
+    # the end. Records whose publisher / subscriber / magazine doesn't exist are skipped.
+    # Nothing is printed per record. On an error everything is rolled back.
+
+    def batches(records, batch_size):
+        """Split an iterable into lists of at most batch_size items."""
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def add_publishers(names, batch_size=10000):
+        """Add many publishers. Returns {name: publisher_id}."""
+        ids = {}
+        try:
+            for batch in batches(names, batch_size):
+                cursor.executemany(
+                    "INSERT INTO publishers (name) VALUES (?) ON CONFLICT DO NOTHING",
+                    ((name,) for name in batch))
+                cursor.execute(
+                    "SELECT name, publisher_id FROM publishers WHERE name IN (SELECT value FROM json_each(?))",
+                    (json.dumps(batch),))
+                ids.update(cursor.fetchall())
+            conn.commit()
+            for name, publisher_id in ids.items():
+                cache_put("publishers", publisher_id, name)
+            return ids
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error adding publishers: {e}")
+            return None
+
+    def add_magazines(magazines, batch_size=10000):
+        """Add many magazines from (name, publisher_id) pairs. Returns {name: magazine_id}."""
+        ids = {}
+        try:
+            for batch in batches(magazines, batch_size):
+                # the SELECT gives no row (so nothing is inserted) if the publisher doesn't exist
+                cursor.executemany('''
+                    INSERT INTO magazines (name, publisher_id)
+                    SELECT ?, publisher_id FROM publishers WHERE publisher_id = ?
+                    ON CONFLICT DO NOTHING
+                ''', batch)
+                cursor.execute(
+                    "SELECT name, magazine_id FROM magazines WHERE name IN (SELECT value FROM json_each(?))",
+                    (json.dumps([name for name, _ in batch]),))
+                ids.update(cursor.fetchall())
+            conn.commit()
+            for name, magazine_id in ids.items():
+                cache_put("magazines", magazine_id, name)
+            return ids
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error adding magazines: {e}")
+            return None
+
+    def add_subscribers(subscribers, batch_size=10000):
+        """Add many subscribers from (name, address) pairs. Returns {(name, address): subscriber_id}."""
+        ids = {}
+        try:
+            for batch in batches(subscribers, batch_size):
+                cursor.executemany(
+                    "INSERT INTO subscribers (name, address) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                    batch)
+                cursor.execute('''
+                    SELECT s.name, s.address, s.subscriber_id
+                    FROM json_each(?) j
+                    JOIN subscribers s
+                      ON s.name = json_extract(j.value, '$[0]') AND s.address = json_extract(j.value, '$[1]')
+                ''', (json.dumps(batch),))
+                for name, address, subscriber_id in cursor.fetchall():
+                    ids[(name, address)] = subscriber_id
+            conn.commit()
+            for name, subscriber_id in ids.items():
+                cache_put("subscribers", subscriber_id, name)
+            return ids
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error adding subscribers: {e}")
+            return None
+
+    def add_subscriptions(subscriptions, batch_size=10000):
+        """
+        Add many subscriptions from (subscriber_id, magazine_id, expiration_date) tuples.
+        Returns the number of subscriptions added (existing ones are left as they are).
+        """
+        try:
+            changes_before = conn.total_changes
+            for batch in batches(subscriptions, batch_size):
+                cursor.executemany('''
+                    INSERT INTO subscriptions (subscriber_id, magazine_id, expiration_date)
+                    SELECT s.subscriber_id, m.magazine_id, ?3
+                    FROM subscribers s, magazines m
+                    WHERE s.subscriber_id = ?1 AND m.magazine_id = ?2
+                    ON CONFLICT DO NOTHING
+                ''', batch)
+            conn.commit()
+            return conn.total_changes - changes_before
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error adding subscriptions: {e}")
+            return None
+
+    # Deleting a row must also drop it from the id cache
+
+    def delete_subscriber(subscriber_id):
+        """Delete a subscriber and their subscriptions. Returns True if the subscriber existed."""
+        try:
+            cursor.execute("DELETE FROM subscriptions WHERE subscriber_id = ?", (subscriber_id,))
+            cursor.execute("DELETE FROM subscribers WHERE subscriber_id = ?", (subscriber_id,))
+            deleted = cursor.rowcount > 0
+            conn.commit()
+            cache_forget("subscribers", subscriber_id)
+            return deleted
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error deleting subscriber: {e}")
+            return False
+
+    def delete_magazine(magazine_id):
+        """Delete a magazine and its subscriptions. Returns True if the magazine existed."""
+        try:
+            cursor.execute("DELETE FROM subscriptions WHERE magazine_id = ?", (magazine_id,))
+            cursor.execute("DELETE FROM magazines WHERE magazine_id = ?", (magazine_id,))
+            deleted = cursor.rowcount > 0
+            conn.commit()
+            cache_forget("magazines", magazine_id)
+            return deleted
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error deleting magazine: {e}")
+            return False
+
     # Populate tables with data
     print("\n--- Populating tables with data ---\n")
     
@@ -221,6 +446,18 @@ try:
     # Final commit
     conn.commit()
     print("\n--- All data committed to database ---\n")
+
+    # The bulk loaders: adding the same data again changes nothing
+    publisher_ids = add_publishers(["National Geographic", "Time Inc.", "Conde Nast"])
+    subscriber_ids = add_subscribers([("Alice Johnson", "123 Main St, New York, NY"),
+                                      ("Bob Smith", "456 Oak Ave, Los Angeles, CA")])
+    added = add_subscriptions([(sub1, mag1, "2026-12-31"), (sub2, mag3, "2027-03-15")])
+    print(f"Bulk load: {len(publisher_ids)} publishers, {len(subscriber_ids)} subscribers found, "
+          f"{added} new subscriptions\n")
+
+    # Every hit is a SELECT that didn't have to run
+    print(f"Id cache: {id_cache_stats['hits']} hits, {id_cache_stats['misses']} misses, "
+          f"{len(id_cache)} entries\n")
     
     # Task 4: SQL Queries
     print("\n--- SQL Queries ---\n")
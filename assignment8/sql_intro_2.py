@@ -1,9 +1,146 @@
+import argparse
+import os
 import sqlite3
+import sys
+import time
 import pandas as pd
 
+# connection_pool.py lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import connection_pool
+import csv_schema
+import stream_groupby
+
+# Every line item with its product
+query = """
+    SELECT 
+        line_items.line_item_id,
+        line_items.quantity,
+        line_items.product_id,
+        products.product_name,
+        products.price
+    FROM line_items
+    JOIN products ON line_items.product_id = products.product_id
+"""
+
+# The same summary as the pandas groupby below, computed by SQLite:
+# only the ~60 summary rows come back instead of every line item
+summary_query = """
+    SELECT
+        line_items.product_id,
+        COUNT(line_items.line_item_id) AS line_item_id,
+        SUM(line_items.quantity * products.price) AS total,
+        products.product_name
+    FROM line_items
+    JOIN products ON line_items.product_id = products.product_id
+    GROUP BY line_items.product_id
+    ORDER BY products.product_name, line_items.product_id
+"""
+
+
+def summary_pandas(conn):
+    """The summary the pandas way: read every line item, then groupby."""
+    df = pd.read_sql_query(query, conn)
+    df['total'] = df['quantity'] * df['price']
+    grouped_df = df.groupby('product_id').agg({
+        'line_item_id': 'count',
+        'total': 'sum',
+        'product_name': 'first'
+    })
+    return grouped_df.sort_values('product_name')
+
+
+def summary_sql(conn):
+    """The summary from one GROUP BY query."""
+    return pd.read_sql_query(summary_query, conn, index_col='product_id')
+
+
+def summary_chunked(conn, chunksize=10000):
+    """
+    The summary in pandas, for when the GROUP BY can't be done in SQL:
+    line items are read chunksize rows at a time, each chunk is grouped,
+    and its partial counts and sums are added to the running summary,
+    so only one chunk is in memory at a time.
+    """
+    summary = None
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunksize):
+        chunk['total'] = chunk['quantity'] * chunk['price']
+        partial = chunk.groupby('product_id').agg({
+            'line_item_id': 'count',
+            'total': 'sum',
+            'product_name': 'first'
+        })
+        if summary is not None:
+            # counts and sums of the same product_id add up
+            partial = pd.concat([summary, partial]).groupby(level=0).agg({
+                'line_item_id': 'sum',
+                'total': 'sum',
+                'product_name': 'first'
+            })
+        summary = partial
+    if summary is None:
+        return pd.DataFrame(columns=['line_item_id', 'total', 'product_name'])
+    return summary.sort_values('product_name')
+
+
+# count, sum(total) and first product_name per product_id, over the rows of query
+# (line_item_id, quantity, product_id, product_name, price)
+summary_aggregations = [
+    ("line_item_id", "count", None),
+    ("total", "sum", lambda row: row[1] * row[4]),
+    ("product_name", "first", lambda row: row[3]),
+]
+
+
+def summary_stream(conn, output_file, chunksize=10000):
+    """
+    The summary without pandas, written straight to output_file: line items
+    are read chunksize rows at a time and only one accumulator per product is
+    kept (see stream_groupby.py). Returns the number of products written.
+    """
+    cursor = conn.execute(query)
+    groups = stream_groupby.aggregate(stream_groupby.read_chunks(cursor, chunksize),
+                                      lambda row: row[2], summary_aggregations)
+    return stream_groupby.write_csv(groups, output_file, "product_id", summary_aggregations,
+                                    sort_by="product_name")
+
+
+def benchmark(conn, repeat=5):
+    """Best-of-repeat time of each way to make the summary (stream includes writing its CSV)."""
+    # each one returns the number of summary rows
+    modes = [
+        ("pandas", lambda: len(summary_pandas(conn))),
+        ("sql", lambda: len(summary_sql(conn))),
+        ("chunked", lambda: len(summary_chunked(conn))),
+        ("stream", lambda: summary_stream(conn, os.devnull)),
+    ]
+    for name, make_summary in modes:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = make_summary()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:8} {best * 1000:8.2f} ms  ({count} summary rows)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize line_items per product into order_summary.csv.")
+    parser.add_argument("--mode", choices=["pandas", "sql", "chunked", "stream"], default="pandas",
+                        help="pandas: groupby every line item (default); sql: GROUP BY in SQLite; "
+                             "chunked: groupby chunk by chunk; stream: chunk by chunk without pandas")
+    parser.add_argument("--chunksize", type=int, default=10000,
+                        help="line items per chunk for --mode chunked and --mode stream")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time the four modes instead of writing the CSV")
+    return parser.parse_args(argv)
+
+
+args = parse_args()
+
 # Connect to the lesson.db database
 try:
-    conn = sqlite3.connect('../db/lesson.db')
+    conn = connection_pool.connect('../db/lesson.db')
     print("Successfully connected to lesson.db!")
     
     # Import CSV data into database (only if tables don't exist)
@@ -15,58 +152,70 @@ try:
         print("Importing data from CSV files...")
         
         # Read products CSV and create table
-        products_df = pd.read_csv('../csv/products.csv')
+        products_df = csv_schema.read_csv('products', csv_dir='../csv')
         products_df.to_sql('products', conn, if_exists='replace', index=False)
         print("Products table created and populated.")
         
         # Read line_items CSV and create table
-        line_items_df = pd.read_csv('../csv/line_items.csv')
+        line_items_df = csv_schema.read_csv('line_items', csv_dir='../csv')
         line_items_df.to_sql('line_items', conn, if_exists='replace', index=False)
         print("Line_items table created and populated.")
     else:
         print("Tables already exist.")
     
+    if args.benchmark:
+        benchmark(conn)
+        conn.close()
+        sys.exit(0)
+
+    if args.mode == "stream":
+        count = summary_stream(conn, 'order_summary.csv', args.chunksize)
+        print(f"\n{count} products written to order_summary.csv")
+        conn.close()
+        sys.exit(0)
+
+    if args.mode == "sql":
+        grouped_df = summary_sql(conn)
+        print(f"\nSummary from SQL (first 5 rows):")
+        print(grouped_df.head())
+    elif args.mode == "chunked":
+        grouped_df = summary_chunked(conn, args.chunksize)
+        print(f"\nSummary from {args.chunksize}-row chunks (first 5 rows):")
+        print(grouped_df.head())
+    else:
+        grouped_df = None
+
     # Read data into DataFrame using JOIN
-    print("\n--- Reading data into DataFrame ---\n")
-    
-    query = """
-        SELECT 
-            line_items.line_item_id,
-            line_items.quantity,
-            line_items.product_id,
-            products.product_name,
-            products.price
-        FROM line_items
-        JOIN products ON line_items.product_id = products.product_id
-    """
-    
-    df = pd.read_sql_query(query, conn)
-    
-    print(f"DataFrame created with {len(df)} rows")
-    print(f"\nFirst 5 rows of the DataFrame:")
-    print(df.head())
-    
-    # Add a 'total' column (quantity * price)
-    df['total'] = df['quantity'] * df['price']
-    
-    print(f"\nFirst 5 rows with 'total' column:")
-    print(df.head())
-    
-    # Group by product_id and aggregate
-    grouped_df = df.groupby('product_id').agg({
-        'line_item_id': 'count',
-        'total': 'sum',
-        'product_name': 'first'
-    })
-    
-    print(f"\nGrouped DataFrame (first 5 rows):")
-    print(grouped_df.head())
-    
-    # Sort by product_name
-    grouped_df = grouped_df.sort_values('product_name')
-    
-    print(f"\nSorted by product_name (first 5 rows):")
-    print(grouped_df.head())
+    if grouped_df is None:
+        print("\n--- Reading data into DataFrame ---\n")
+
+        df = pd.read_sql_query(query, conn)
+
+        print(f"DataFrame created with {len(df)} rows")
+        print(f"\nFirst 5 rows of the DataFrame:")
+        print(df.head())
+
+        # Add a 'total' column (quantity * price)
+        df['total'] = df['quantity'] * df['price']
+
+        print(f"\nFirst 5 rows with 'total' column:")
+        print(df.head())
+
+        # Group by product_id and aggregate
+        grouped_df = df.groupby('product_id').agg({
+            'line_item_id': 'count',
+            'total': 'sum',
+            'product_name': 'first'
+        })
+
+        print(f"\nGrouped DataFrame (first 5 rows):")
+        print(grouped_df.head())
+
+        # Sort by product_name
+        grouped_df = grouped_df.sort_values('product_name')
+
+        print(f"\nSorted by product_name (first 5 rows):")
+        print(grouped_df.head())
     
     # Write DataFrame to CSV file
     output_file = 'order_summary.csv'
@@ -0,0 +1,80 @@
+# Streaming groupby: aggregate rows chunk by chunk, keeping one accumulator per key
+# Only one chunk of rows and the accumulators are in memory at a time, so memory
+# grows with the number of groups, not with the number of rows.
+#
+# aggregations is a list of (output column, how, value) where how is
+# "count", "sum" or "first" and value is a function of a row:
+#   aggregations = [
+#       ("line_item_id", "count", None),
+#       ("total", "sum", lambda row: row[1] * row[4]),
+#       ("product_name", "first", lambda row: row[3]),
+#   ]
+#   groups = aggregate(read_chunks(cursor), lambda row: row[2], aggregations)
+import csv
+
+
+def read_chunks(cursor, chunksize=10000):
+    """Yield the rows of an executed cursor chunksize at a time."""
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            return
+        yield rows
+
+
+def aggregate_chunk(rows, key, aggregations):
+    """The partial result of one chunk: {key: [accumulator per aggregation]}."""
+    groups = {}
+    for row in rows:
+        k = key(row)
+        accumulators = groups.get(k)
+        if accumulators is None:
+            groups[k] = [1 if how == "count" else value(row) for _, how, value in aggregations]
+            continue
+        for i, (_, how, value) in enumerate(aggregations):
+            if how == "count":
+                accumulators[i] += 1
+            elif how == "sum":
+                accumulators[i] += value(row)
+            # "first" keeps the value it has
+    return groups
+
+
+def merge(groups, partial, aggregations):
+    """Add a partial result into groups (in place): counts and sums add up, firsts stay."""
+    for k, accumulators in partial.items():
+        total = groups.get(k)
+        if total is None:
+            groups[k] = accumulators
+            continue
+        for i, (_, how, _) in enumerate(aggregations):
+            if how != "first":
+                total[i] += accumulators[i]
+    return groups
+
+
+def aggregate(chunks, key, aggregations):
+    """Group all chunks of rows by key. Returns {key: [accumulator per aggregation]}."""
+    groups = {}
+    for rows in chunks:
+        merge(groups, aggregate_chunk(rows, key, aggregations), aggregations)
+    return groups
+
+
+def write_csv(groups, path, key_name, aggregations, sort_by=None):
+    """
+    Write the groups to a CSV file, one row per key: key_name, then the aggregations.
+    sort_by is the output column to sort by (default: the key). Returns the row count.
+    """
+    names = [name for name, _, _ in aggregations]
+    if sort_by is None or sort_by == key_name:
+        items = sorted(groups.items())
+    else:
+        column = names.index(sort_by)
+        items = sorted(groups.items(), key=lambda item: item[1][column])
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")  # same line endings as pandas' to_csv
+        writer.writerow([key_name] + names)
+        for k, accumulators in items:
+            writer.writerow([k] + accumulators)
+    return len(items)
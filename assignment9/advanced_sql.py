@@ -1,17 +1,27 @@
+import argparse
+import csv
+import json
+import os
 import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Connect to the database
-conn = sqlite3.connect("../db/lesson.db")
-conn.execute("PRAGMA foreign_keys = 1")
+# connection_pool.py lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import connection_pool
 
-cursor = conn.cursor()
+db_path = "../db/lesson.db"
+
+# every task borrows a connection from here instead of opening its own
+pool = connection_pool.get_pool(db_path)
 
 # SQL query: Find the total price of each of the first 5 orders
 # Joins orders, line_items, and products tables
 # Groups by order_id and sums the product of price and quantity
 sql_query = """
-SELECT 
-    o.order_id, 
+SELECT
+    o.order_id,
     SUM(p.price * li.quantity) as total_price
 FROM orders o
 JOIN line_items li ON o.order_id = li.order_id
@@ -21,44 +31,17 @@ ORDER BY o.order_id
 LIMIT 5
 """
 
-try:
-    cursor.execute(sql_query)
-    results = cursor.fetchall()
-    
-    print("Order ID | Total Price")
-    print("-" * 30)
-    for row in results:
-        order_id, total_price = row
-        print(f"{order_id:8} | ${total_price:.2f}")
-        
-except sqlite3.Error as e:
-    print(f"Error executing query: {e}")
-
-finally:
-    conn.close()
-    print("\nDatabase connection closed.")
-
-# Task 2: Understanding Subqueries
-print("\n" + "="*60)
-print("Task 2: Average Order Price per Customer (using subquery)")
-print("="*60 + "\n")
-
-# Reconnect to the database
-conn = sqlite3.connect("../db/lesson.db")
-conn.execute("PRAGMA foreign_keys = 1")
-cursor = conn.cursor()
-
 # SQL query with subquery: Find average price of orders for each customer
 # Subquery calculates total price for each order
 # Main query joins customers with order totals and averages them per customer
 sql_query_2 = """
-SELECT 
-    c.customer_name, 
+SELECT
+    c.customer_name,
     AVG(order_totals.total_price) as average_total_price
 FROM customers c
 LEFT JOIN (
-    SELECT 
-        o.customer_id AS customer_id_b, 
+    SELECT
+        o.customer_id AS customer_id_b,
         SUM(p.price * li.quantity) as total_price
     FROM orders o
     JOIN line_items li ON o.order_id = li.order_id
@@ -69,155 +52,525 @@ GROUP BY c.customer_id, c.customer_name
 ORDER BY c.customer_name
 """
 
-try:
-    cursor.execute(sql_query_2)
-    results = cursor.fetchall()
-    
-    print("Customer Name                        | Avg Order Price")
-    print("-" * 60)
-    for row in results:
-        customer_name, avg_price = row
-        if avg_price is not None:
-            print(f"{customer_name:40} | ${avg_price:.2f}")
-        else:
-            print(f"{customer_name:40} | No orders")
-
-except sqlite3.Error as e:
-    print(f"Error executing query: {e}")
-
-finally:
-    conn.close()
-    print("\nDatabase connection closed.")
-
-# Task 3: An Insert Transaction Based on Data
-print("\n" + "="*60)
-print("Task 3: Create New Order Transaction")
-print("="*60 + "\n")
-
-# Reconnect to the database
-conn = sqlite3.connect("../db/lesson.db")
-conn.execute("PRAGMA foreign_keys = 1")
-cursor = conn.cursor()
-
-try:
-    # Begin transaction
-    conn.execute("BEGIN TRANSACTION")
-
-    # Step 1: Get customer_id for 'Perez and Sons'
-    cursor.execute("SELECT customer_id FROM customers WHERE customer_name = ?", 
-                   ('Perez and Sons',))
-    customer_result = cursor.fetchone()
-    if not customer_result:
-        raise Exception("Customer 'Perez and Sons' not found")
-    customer_id = customer_result[0]
-    print(f"Customer ID for 'Perez and Sons': {customer_id}")
-
-    # Step 2: Get employee_id for Miranda Harris
-    cursor.execute("SELECT employee_id FROM employees WHERE first_name = ? AND last_name = ?",
-                   ('Miranda', 'Harris'))
-    employee_result = cursor.fetchone()
-    if not employee_result:
-        raise Exception("Employee 'Miranda Harris' not found")
-    employee_id = employee_result[0]
-    print(f"Employee ID for 'Miranda Harris': {employee_id}")
-
-    # Step 3: Get 5 least expensive products
-    cursor.execute("SELECT product_id, product_name, price FROM products ORDER BY price LIMIT 5")
-    products = cursor.fetchall()
-    print(f"\n5 Least Expensive Products:")
-    for product in products:
-        print(f"  Product ID {product[0]}: {product[1]} - ${product[2]:.2f}")
-
-    # Step 4: Create new order with today's date
-    cursor.execute("""
-        INSERT INTO orders (customer_id, employee_id, date) 
-        VALUES (?, ?, ?) 
-        RETURNING order_id
-    """, (customer_id, employee_id, '2026-01-30'))
-
-    order_result = cursor.fetchone()
-    order_id = order_result[0]
-    print(f"\nCreated Order ID: {order_id}")
-
-    # Step 5: Create line_items for each of the 5 products (10 of each)
-    print("\nCreating line items...")
-    for product in products:
-        product_id = product[0]
-        cursor.execute("""
-            INSERT INTO line_items (order_id, product_id, quantity)
-            VALUES (?, ?, ?)
-        """, (order_id, product_id, 10))
-        print(f"  Added 10 units of product {product_id}")
+# The same two reports read from order_totals, the per-order totals that
+# load_db.py keeps up to date with triggers, instead of joining every line item
+sql_query_totals = """
+SELECT
+    order_id,
+    total_price
+FROM order_totals
+ORDER BY order_id
+LIMIT 5
+"""
 
-    # Commit the transaction
-    conn.commit()
-    print("\nTransaction committed successfully!")
+sql_query_2_totals = """
+SELECT
+    c.customer_name,
+    AVG(t.total_price) as average_total_price
+FROM customers c
+LEFT JOIN order_totals t ON t.customer_id = c.customer_id
+GROUP BY c.customer_id, c.customer_name
+ORDER BY c.customer_name
+"""
 
-    # Step 6: Query the line_items with JOIN to show the result
-    cursor.execute("""
+# Task 3 lookups: customer and employee by name, the cheapest products, and the new order's items
+customer_query = "SELECT customer_id FROM customers WHERE customer_name = ?"
+employee_query = "SELECT employee_id FROM employees WHERE first_name = ? AND last_name = ?"
+cheapest_products_query = "SELECT product_id, product_name, price FROM products ORDER BY price LIMIT 5"
+order_line_items_query = """
         SELECT li.line_item_id, li.quantity, p.product_name
         FROM line_items li
         JOIN products p ON li.product_id = p.product_id
         WHERE li.order_id = ?
-    """, (order_id,))
-
-    line_items = cursor.fetchall()
-
-    print(f"\nLine Items for Order {order_id}:")
-    print("-" * 60)
-    print("Line Item ID | Quantity | Product Name")
-    print("-" * 60)
-    for item in line_items:
-        print(f"{item[0]:12} | {item[1]:8} | {item[2]}")
-
-except sqlite3.Error as e:
-    conn.rollback()
-    print(f"Transaction failed and rolled back: {e}")
-except Exception as e:
-    conn.rollback()
-    print(f"Error: {e}")
-finally:
-    conn.close()
-    print("\nDatabase connection closed.")
-
-# Task 4: Aggregation with HAVING
-print("\n" + "="*60)
-print("Task 4: Employees with More Than 5 Orders")
-print("="*60 + "\n")
-
-# Reconnect to the database
-conn = sqlite3.connect("../db/lesson.db")
-conn.execute("PRAGMA foreign_keys = 1")
-cursor = conn.cursor()
+        ORDER BY li.line_item_id
+    """
 
 # SQL query: Find employees with more than 5 orders
 # Uses JOIN, GROUP BY, COUNT, and HAVING
 sql_query_4 = """
-SELECT 
-    e.employee_id, 
-    e.first_name, 
-    e.last_name, 
+SELECT
+    e.employee_id,
+    e.first_name,
+    e.last_name,
     COUNT(o.order_id) as order_count
 FROM employees e
 JOIN orders o ON e.employee_id = o.employee_id
 GROUP BY e.employee_id, e.first_name, e.last_name
 HAVING COUNT(o.order_id) > 5
-ORDER BY order_count DESC
+ORDER BY order_count DESC, e.employee_id
+"""
+
+# Keyset-paged versions of the Task 1 and Task 2 reports over all rows.
+# Each page starts after the last key of the previous one (WHERE key > ?) and
+# walks the primary key, so every page costs the same no matter how deep it is
+# (unlike OFFSET, which reads and throws away all the rows before the page).
+order_totals_page_query = """
+SELECT order_id, total_price
+FROM order_totals
+WHERE order_id > ?
+ORDER BY order_id
+LIMIT ?
+"""
+
+# for databases without order_totals
+order_totals_page_query_joins = """
+SELECT
+    o.order_id,
+    SUM(p.price * li.quantity) as total_price
+FROM orders o
+JOIN line_items li ON o.order_id = li.order_id
+JOIN products p ON li.product_id = p.product_id
+WHERE o.order_id > ?
+GROUP BY o.order_id
+ORDER BY o.order_id
+LIMIT ?
+"""
+
+customer_average_page_query = """
+SELECT
+    c.customer_id,
+    c.customer_name,
+    (SELECT AVG(t.total_price) FROM order_totals t WHERE t.customer_id = c.customer_id) as average_total_price
+FROM customers c
+WHERE c.customer_id > ?
+ORDER BY c.customer_id
+LIMIT ?
+"""
+
+customer_average_page_query_joins = """
+SELECT
+    c.customer_id,
+    c.customer_name,
+    (SELECT AVG(order_totals.total_price) FROM (
+        SELECT SUM(p.price * li.quantity) as total_price
+        FROM orders o
+        JOIN line_items li ON o.order_id = li.order_id
+        JOIN products p ON li.product_id = p.product_id
+        WHERE o.customer_id = c.customer_id
+        GROUP BY o.order_id
+    ) AS order_totals) as average_total_price
+FROM customers c
+WHERE c.customer_id > ?
+ORDER BY c.customer_id
+LIMIT ?
 """
 
-try:
-    cursor.execute(sql_query_4)
-    results = cursor.fetchall()
+# (name, sql, sample parameters) of every read query above, for tools like index_advisor.py
+report_queries = [
+    ("Task 1: order totals", sql_query, ()),
+    ("Task 2: average order per customer", sql_query_2, ()),
+    ("Task 1: order totals (order_totals)", sql_query_totals, ()),
+    ("Task 2: average order per customer (order_totals)", sql_query_2_totals, ()),
+    ("Task 3: customer by name", customer_query, ("Perez and Sons",)),
+    ("Task 3: employee by name", employee_query, ("Miranda", "Harris")),
+    ("Task 3: cheapest products", cheapest_products_query, ()),
+    ("Task 3: line items of an order", order_line_items_query, (1,)),
+    ("Task 4: employees with more than 5 orders", sql_query_4, ()),
+    ("Stream: order totals page", order_totals_page_query, (0, 1000)),
+    ("Stream: customer averages page", customer_average_page_query, (0, 1000)),
+]
+
+
+def has_order_totals(conn):
+    """True if the database has the order_totals table (databases made by older load_db.py don't)."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'order_totals'").fetchone() is not None
+
+
+# The read-only reports: each takes a connection and returns the rows
+def order_totals_rows(conn):
+    return conn.execute(sql_query_totals if has_order_totals(conn) else sql_query).fetchall()
+
+
+def average_order_rows(conn):
+    return conn.execute(sql_query_2_totals if has_order_totals(conn) else sql_query_2).fetchall()
+
+
+def busy_employee_rows(conn):
+    return conn.execute(sql_query_4).fetchall()
+
+
+read_reports = {
+    "Task 1: order totals": order_totals_rows,
+    "Task 2: average order per customer": average_order_rows,
+    "Task 4: employees with more than 5 orders": busy_employee_rows,
+}
+
+
+def task1():
+    # Borrow a connection (foreign_keys is already on)
+    conn = pool.acquire()
+
+    try:
+        results = order_totals_rows(conn)
+
+        print("Order ID | Total Price")
+        print("-" * 30)
+        for row in results:
+            order_id, total_price = row
+            print(f"{order_id:8} | ${total_price:.2f}")
+
+    except sqlite3.Error as e:
+        print(f"Error executing query: {e}")
+
+    finally:
+        pool.release(conn)
+        print("\nDatabase connection returned to the pool.")
 
-    print("Employee ID | First Name    | Last Name     | Order Count")
-    print("-" * 60)
-    for row in results:
-        emp_id, first_name, last_name, order_count = row
-        print(f"{emp_id:11} | {first_name:13} | {last_name:13} | {order_count}")
 
-except sqlite3.Error as e:
-    print(f"Error executing query: {e}")
+# Task 2: Understanding Subqueries
+def task2():
+    print("\n" + "="*60)
+    print("Task 2: Average Order Price per Customer (using subquery)")
+    print("="*60 + "\n")
+
+    # Borrow a connection again (the pool keeps it open between tasks)
+    conn = pool.acquire()
+
+    try:
+        results = average_order_rows(conn)
+
+        print("Customer Name                        | Avg Order Price")
+        print("-" * 60)
+        for row in results:
+            customer_name, avg_price = row
+            if avg_price is not None:
+                print(f"{customer_name:40} | ${avg_price:.2f}")
+            else:
+                print(f"{customer_name:40} | No orders")
+
+    except sqlite3.Error as e:
+        print(f"Error executing query: {e}")
+
+    finally:
+        pool.release(conn)
+        print("\nDatabase connection returned to the pool.")
+
+
+# Task 3: An Insert Transaction Based on Data
+def task3():
+    print("\n" + "="*60)
+    print("Task 3: Create New Order Transaction")
+    print("="*60 + "\n")
+
+    # Borrow a connection again (the pool keeps it open between tasks)
+    conn = pool.acquire()
+    cursor = conn.cursor()
+
+    try:
+        # Begin transaction
+        conn.execute("BEGIN TRANSACTION")
+
+        # Step 1: Get customer_id for 'Perez and Sons'
+        cursor.execute(customer_query, ('Perez and Sons',))
+        customer_result = cursor.fetchone()
+        if not customer_result:
+            raise Exception("Customer 'Perez and Sons' not found")
+        customer_id = customer_result[0]
+        print(f"Customer ID for 'Perez and Sons': {customer_id}")
+
+        # Step 2: Get employee_id for Miranda Harris
+        cursor.execute(employee_query, ('Miranda', 'Harris'))
+        employee_result = cursor.fetchone()
+        if not employee_result:
+            raise Exception("Employee 'Miranda Harris' not found")
+        employee_id = employee_result[0]
+        print(f"Employee ID for 'Miranda Harris': {employee_id}")
+
+        # Step 3: Get 5 least expensive products
+        cursor.execute(cheapest_products_query)
+        products = cursor.fetchall()
+        print(f"\n5 Least Expensive Products:")
+        for product in products:
+            print(f"  Product ID {product[0]}: {product[1]} - ${product[2]:.2f}")
+
+        # Step 4: Create new order with today's date
+        cursor.execute("""
+            INSERT INTO orders (customer_id, employee_id, date)
+            VALUES (?, ?, ?)
+            RETURNING order_id
+        """, (customer_id, employee_id, '2026-01-30'))
+
+        order_result = cursor.fetchone()
+        order_id = order_result[0]
+        print(f"\nCreated Order ID: {order_id}")
+
+        # Step 5: Create line_items for each of the 5 products (10 of each)
+        print("\nCreating line items...")
+        for product in products:
+            product_id = product[0]
+            cursor.execute("""
+                INSERT INTO line_items (order_id, product_id, quantity)
+                VALUES (?, ?, ?)
+            """, (order_id, product_id, 10))
+            print(f"  Added 10 units of product {product_id}")
+
+        # Commit the transaction
+        conn.commit()
+        print("\nTransaction committed successfully!")
+
+        # Step 6: Query the line_items with JOIN to show the result
+        cursor.execute(order_line_items_query, (order_id,))
+
+        line_items = cursor.fetchall()
+
+        print(f"\nLine Items for Order {order_id}:")
+        print("-" * 60)
+        print("Line Item ID | Quantity | Product Name")
+        print("-" * 60)
+        for item in line_items:
+            print(f"{item[0]:12} | {item[1]:8} | {item[2]}")
+
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Transaction failed and rolled back: {e}")
+    except Exception as e:
+        conn.rollback()
+        print(f"Error: {e}")
+    finally:
+        pool.release(conn)
+        print("\nDatabase connection returned to the pool.")
+
+
+# Task 3 in bulk: many orders in one transaction
+def create_orders_bulk(orders, conn=None):
+    """
+    Create many orders the way Task 3 creates one, but set-based:
+    each order is a dict like
+        {"customer": "Perez and Sons", "employee": ("Miranda", "Harris"),
+         "date": "2026-01-30", "items": [(product_id, quantity), ...]}
+    Customer and employee names are resolved with one query each, orders and
+    line items are inserted with executemany, and everything is committed in
+    a single transaction. Returns the new order_ids, in the same order as orders.
+    Raises ValueError (and inserts nothing) if a name is not found.
+    If conn already has a transaction open, the orders go into it under a
+    SAVEPOINT: they are committed with the caller's work, and a failure only
+    undoes the orders, not what the caller did before.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = pool.acquire()
+    nested = conn.in_transaction
+    try:
+        if nested:
+            conn.execute("SAVEPOINT create_orders_bulk")
+        else:
+            # BEGIN IMMEDIATE: take the write lock now, so nobody else can use the ids we hand out
+            conn.execute("BEGIN IMMEDIATE")
+
+        # one query per name type; json_each turns the parameter into a table, so any number of names fits
+        customer_names = sorted({order["customer"] for order in orders})
+        customers = dict(conn.execute("""
+            SELECT c.customer_name, c.customer_id
+            FROM customers c
+            WHERE c.customer_name IN (SELECT value FROM json_each(?))
+        """, (json.dumps(customer_names),)).fetchall())
+
+        employee_names = sorted({tuple(order["employee"]) for order in orders})
+        employees = {}
+        for first_name, last_name, employee_id in conn.execute("""
+            SELECT e.first_name, e.last_name, e.employee_id
+            FROM employees e
+            JOIN json_each(?) j
+              ON e.first_name = json_extract(j.value, '$[0]') AND e.last_name = json_extract(j.value, '$[1]')
+        """, (json.dumps(employee_names),)):
+            employees[(first_name, last_name)] = employee_id
+
+        missing = [name for name in customer_names if name not in customers]
+        missing += [" ".join(name) for name in employee_names if name not in employees]
+        if missing:
+            raise ValueError(f"Not found: {', '.join(missing)}")
+
+        # ids are handed out here instead of RETURNING, so executemany can do all the inserts
+        max_order_id = conn.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders").fetchone()[0]
+        order_ids = list(range(max_order_id + 1, max_order_id + 1 + len(orders)))
+
+        conn.executemany(
+            "INSERT INTO orders (order_id, customer_id, employee_id, date) VALUES (?, ?, ?, ?)",
+            ((order_id, customers[order["customer"]], employees[tuple(order["employee"])], order["date"])
+             for order_id, order in zip(order_ids, orders)))
+        conn.executemany(
+            "INSERT INTO line_items (order_id, product_id, quantity) VALUES (?, ?, ?)",
+            ((order_id, product_id, quantity)
+             for order_id, order in zip(order_ids, orders)
+             for product_id, quantity in order["items"]))
+
+        if nested:
+            conn.execute("RELEASE create_orders_bulk")  # the caller commits
+        else:
+            conn.commit()
+        return order_ids
 
-finally:
-    conn.close()
-    print("\nDatabase connection closed.")
+    except Exception:
+        if nested:
+            conn.execute("ROLLBACK TO create_orders_bulk")
+            conn.execute("RELEASE create_orders_bulk")
+        else:
+            conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            pool.release(conn)
+
+
+# Task 4: Aggregation with HAVING
+def task4():
+    print("\n" + "="*60)
+    print("Task 4: Employees with More Than 5 Orders")
+    print("="*60 + "\n")
+
+    # Borrow a connection again (the pool keeps it open between tasks)
+    conn = pool.acquire()
+
+    try:
+        results = busy_employee_rows(conn)
+
+        print("Employee ID | First Name    | Last Name     | Order Count")
+        print("-" * 60)
+        for row in results:
+            emp_id, first_name, last_name, order_count = row
+            print(f"{emp_id:11} | {first_name:13} | {last_name:13} | {order_count}")
+
+    except sqlite3.Error as e:
+        print(f"Error executing query: {e}")
+
+    finally:
+        pool.release(conn)
+        print("\nDatabase connection returned to the pool.")
+
+
+def keyset_pages(conn, sql, page_size=1000, after=0):
+    """
+    Yield the rows of a keyset query (one with `WHERE key > ? ... ORDER BY key LIMIT ?`,
+    the key being the first column) page by page. Only one page is in memory
+    at a time, and the first rows come back after the first page, not after
+    the whole result.
+    """
+    if page_size < 1:
+        # LIMIT 0 would give no key to continue from, and a negative LIMIT means no limit
+        raise ValueError(f"page_size must be at least 1, not {page_size}")
+    while True:
+        rows = conn.execute(sql, (after, page_size)).fetchall()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1][0]
+
+
+# name: (paged query, fallback without order_totals, CSV header)
+stream_reports = {
+    "order_totals": (order_totals_page_query, order_totals_page_query_joins,
+                     ["order_id", "total_price"]),
+    "customer_averages": (customer_average_page_query, customer_average_page_query_joins,
+                          ["customer_id", "customer_name", "average_total_price"]),
+}
+
+
+def stream_report(name, page_size=1000):
+    """
+    Yield every row of a stream_reports report, keyset-paged.
+    The pooled connection goes back to the pool when the rows run out
+    (or when the generator is closed).
+    """
+    sql, sql_joins, _ = stream_reports[name]
+    with pool.connection() as conn:
+        if not has_order_totals(conn):
+            sql = sql_joins
+        yield from keyset_pages(conn, sql, page_size)
+
+
+def write_report_csv(name, out, page_size=1000):
+    """Write a stream_reports report to the file object out as CSV. Returns the row count."""
+    writer = csv.writer(out)
+    writer.writerow(stream_reports[name][2])
+    count = 0
+    for row in stream_report(name, page_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def run_reports_concurrently(names=None, workers=None, use_wal=True):
+    """
+    Run the read-only reports at the same time, each on its own read-only
+    connection (mode=ro URI), so the whole run takes about as long as the
+    slowest report. use_wal switches the database to WAL first (it stays
+    that way), so the readers never wait for a writer.
+    Prints a latency table as the reports finish and returns
+    {name: (rows, seconds)}.
+    """
+    names = list(read_reports) if names is None else names
+    if use_wal:
+        with pool.connection() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+
+    ro_uri = "file:" + os.path.abspath(db_path) + "?mode=ro"
+    ro_pool = connection_pool.ConnectionPool(ro_uri, size=len(names), uri=True)
+
+    def run(name):
+        with ro_pool.connection() as conn:
+            start = time.perf_counter()
+            rows = read_reports[name](conn)
+            return rows, time.perf_counter() - start
+
+    results = {}
+    start = time.perf_counter()
+    print(f"{'Report':45} | {'seconds':>8} | {'rows':>6}")
+    print("-" * 66)
+    try:
+        # sqlite3 lets go of the GIL while a query runs, so threads are enough here
+        with ThreadPoolExecutor(max_workers=workers or len(names)) as executor:
+            futures = {executor.submit(run, name): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                rows, seconds = future.result()
+                results[name] = (rows, seconds)
+                print(f"{name:45} | {seconds:8.4f} | {len(rows):6}")
+    finally:
+        # the with block waits for the other reports, so all connections are back by now
+        ro_pool.close()
+    wall = time.perf_counter() - start
+
+    print("-" * 66)
+    print(f"{'wall time':45} | {wall:8.4f} |")
+    print(f"{'sum of reports':45} | {sum(s for _, s in results.values()):8.4f} |")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Assignment 9 reports on ../db/lesson.db.")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="run only the read-only reports (no Task 3 insert), all at once")
+    parser.add_argument("--stream", choices=list(stream_reports),
+                        help="write every row of a report as CSV, keyset-paged")
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="rows per page for --stream")
+    parser.add_argument("--output", metavar="FILE",
+                        help="CSV file for --stream (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.concurrent:
+        run_reports_concurrently()
+        connection_pool.close_all()
+        sys.exit(0)
+    if args.stream:
+        if args.output:
+            with open(args.output, "w", newline="") as f:
+                count = write_report_csv(args.stream, f, args.page_size)
+            print(f"{count} rows written to {args.output}")
+        else:
+            write_report_csv(args.stream, sys.stdout, args.page_size)
+        connection_pool.close_all()
+        sys.exit(0)
+
+    task1()
+    task2()
+    task3()
+    task4()
+    connection_pool.close_all()
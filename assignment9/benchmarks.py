@@ -0,0 +1,40 @@
+# Benchmarks for the advanced_sql.py helpers
+# Run from the assignment9 folder: python benchmarks.py
+import os
+import tempfile
+import time
+
+import advanced_sql
+import connection_pool
+import index_advisor
+
+
+def benchmark_create_orders_bulk(order_count=5_000, items_per_order=5):
+    """Line items per second for create_orders_bulk, on a throwaway copy of lesson.db."""
+    with tempfile.TemporaryDirectory() as tmp:
+        index_advisor.build_scaled_db(os.path.join(tmp, "copy.db"), 1).close()
+        conn = connection_pool.connect(os.path.join(tmp, "copy.db"))
+
+        customers = [row[0] for row in conn.execute("SELECT customer_name FROM customers")]
+        employees = [row for row in conn.execute("SELECT first_name, last_name FROM employees")]
+        products = [row[0] for row in conn.execute("SELECT product_id FROM products")]
+        orders = [
+            {"customer": customers[i % len(customers)],
+             "employee": employees[i % len(employees)],
+             "date": "2026-01-30",
+             "items": [(products[(i + j) % len(products)], 10) for j in range(items_per_order)]}
+            for i in range(order_count)
+        ]
+
+        start = time.perf_counter()
+        order_ids = advanced_sql.create_orders_bulk(orders, conn=conn)
+        seconds = time.perf_counter() - start
+        conn.close()
+
+    items = order_count * items_per_order
+    print(f"create_orders_bulk: {len(order_ids)} orders, {items} line items in {seconds:.3f} s "
+          f"({items / seconds:,.0f} line items/sec)")
+
+
+if __name__ == "__main__":
+    benchmark_create_orders_bulk()
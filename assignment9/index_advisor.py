@@ -0,0 +1,122 @@
+# Index advisor for the advanced_sql.py queries
+# Run from the assignment9 folder:
+#   python index_advisor.py              show the query plans and flag full scans
+#   python index_advisor.py --benchmark  time the queries without/with the indexes on a scaled-up copy
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import advanced_sql  # also puts the repository root on sys.path
+
+# load_db.py (in the repository root) owns the schema and the index list
+import load_db
+
+
+def query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines of a query."""
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def advise(conn):
+    """
+    Print the plan of every report query and flag each SCAN (a full pass over a
+    table or an index). Returns a list of (query name, plan line) for the scans.
+    Aggregates over all orders (Tasks 1, 2 and 4) still need one scan of their
+    driving table; the flag says whether that scan is of a table or of an index.
+    """
+    flagged = []
+    for name, sql, params in advanced_sql.report_queries:
+        print(name)
+        for detail in query_plan(conn, sql, params):
+            if detail.startswith("SCAN") and detail != "SCAN CONSTANT ROW":
+                flagged.append((name, detail))
+                print(f"  {detail}   <-- full scan")
+            else:
+                print(f"  {detail}")
+    print(f"\n{len(flagged)} full scans flagged")
+    return flagged
+
+
+def build_scaled_db(path, scale):
+    """Copy lesson.db to path and repeat its orders and line_items `scale` times."""
+    source = sqlite3.connect(advanced_sql.db_path)
+    conn = sqlite3.connect(path)
+    source.backup(conn)
+    source.close()
+
+    max_order, = conn.execute("SELECT MAX(order_id) FROM orders").fetchone()
+    max_item, = conn.execute("SELECT MAX(line_item_id) FROM line_items").fetchone()
+    conn.execute("PRAGMA synchronous = OFF")
+    for copy in range(1, scale):
+        conn.execute("""
+            INSERT INTO orders (order_id, customer_id, employee_id, date)
+            SELECT order_id + ?, customer_id, employee_id, date FROM orders WHERE order_id <= ?
+        """, (copy * max_order, max_order))
+        conn.execute("""
+            INSERT INTO line_items (line_item_id, order_id, product_id, quantity)
+            SELECT line_item_id + ?, order_id + ?, product_id, quantity
+            FROM line_items WHERE line_item_id <= ?
+        """, (copy * max_item, copy * max_order, max_item))
+    conn.commit()
+    return conn
+
+
+def drop_indexes(conn):
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+    conn.commit()
+
+
+def time_queries(conn, repeat=3):
+    """Best-of-repeat time in ms of every report query."""
+    timings = {}
+    for name, sql, params in advanced_sql.report_queries:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return timings
+
+
+def benchmark(scale=200):
+    """Time the report queries on a scaled-up copy of lesson.db, without and with the indexes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_scaled_db(os.path.join(tmp, "scaled.db"), scale)
+        line_items, = conn.execute("SELECT COUNT(*) FROM line_items").fetchone()
+        print(f"Scaled copy: {scale}x, {line_items} line_items\n")
+
+        drop_indexes(conn)
+        before = time_queries(conn)
+        load_db.create_indexes(conn)
+        # drop_indexes() also dropped the order_totals index, which create_order_totals() owns
+        load_db.create_order_totals(conn, rebuild=False)
+        after = time_queries(conn)
+        conn.close()
+
+    print(f"{'Query':45} | {'before':>10} | {'after':>10}")
+    print("-" * 72)
+    for name in before:
+        print(f"{name:45} | {before[name]:8.2f}ms | {after[name]:8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the advanced_sql.py queries for full scans.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time the queries before/after the indexes on a scaled-up copy")
+    parser.add_argument("--scale", type=int, default=200,
+                        help="how many times to repeat orders and line_items for --benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.scale)
+    else:
+        with advanced_sql.pool.connection() as conn:
+            advise(conn)
@@ -0,0 +1,143 @@
+# Shared, pre-configured SQLite connections for the lesson scripts
+# Usage from a script in a sub folder:
+#   sys.path.insert(0, "..")  (the repository root)
+#   import connection_pool
+#   pool = connection_pool.get_pool("../db/lesson.db")
+#   with pool.connection() as conn:
+#       conn.execute(...)
+# Run `python connection_pool.py` from the repository root for the setup overhead benchmark.
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+def connect(path, cached_statements=256, mmap_size=None, cache_size=None, **kwargs):
+    """
+    Open a connection with the settings every script wants:
+      - PRAGMA foreign_keys = 1
+      - a bigger prepared statement cache (cached_statements)
+      - optional PRAGMA mmap_size (bytes of the file to memory-map) and
+        PRAGMA cache_size (pages, or KiB if negative)
+    Other keyword arguments (isolation_level, uri, ...) go to sqlite3.connect.
+    """
+    conn = sqlite3.connect(path, cached_statements=cached_statements, **kwargs)
+    conn.execute("PRAGMA foreign_keys = 1")
+    if mmap_size is not None:
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    if cache_size is not None:
+        conn.execute(f"PRAGMA cache_size = {int(cache_size)}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    A small pool of connections made by connect(). Connections are opened on
+    demand up to `size`, handed out with connection(), and kept open for the
+    next caller, so the open + PRAGMA cost is paid once per connection.
+    """
+
+    def __init__(self, path, size=4, **settings):
+        self.path = path
+        self.size = size
+        self.settings = settings
+        self.idle = queue.LifoQueue()  # most recently used first: its pages are still cached
+        self.opened = 0
+        self.lock = threading.Lock()
+        # pooled connections may be handed to another thread than the one that opened them
+        self.settings.setdefault("check_same_thread", False)
+
+    def acquire(self, timeout=None):
+        """Take an idle connection, open a new one if below size, or wait for one."""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                try:
+                    return connect(self.path, **self.settings)
+                except Exception:
+                    self.opened -= 1
+                    raise
+        return self.idle.get(timeout=timeout)
+
+    def release(self, conn):
+        """Give a connection back. An unfinished transaction is rolled back first."""
+        if conn.in_transaction:
+            conn.rollback()
+        self.idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close the idle connections (release the ones still in use first)."""
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(path, **settings):
+    """
+    The shared pool for a database file (one per absolute path).
+    settings are used only when the pool is first created.
+    """
+    key = os.path.abspath(path)
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(path, **settings)
+        return pools[key]
+
+
+def close_all():
+    with pools_lock:
+        for pool in pools.values():
+            pool.close()
+        pools.clear()
+
+
+def benchmark(path="./db/lesson.db", count=2000):
+    """Time `count` short queries with a new connection each vs a pooled connection."""
+    query = "SELECT COUNT(*) FROM employees"
+
+    start = time.perf_counter()
+    for _ in range(count):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA foreign_keys = 1")
+        conn.execute(query).fetchone()
+        conn.close()
+    fresh = time.perf_counter() - start
+
+    pool = ConnectionPool(path, size=1)
+    start = time.perf_counter()
+    for _ in range(count):
+        with pool.connection() as conn:
+            conn.execute(query).fetchone()
+    pooled = time.perf_counter() - start
+    pool.close()
+
+    print(f"{count} queries on {path}:")
+    print(f"  new connection each time : {fresh:.3f} s ({fresh / count * 1e6:.0f} us per query)")
+    print(f"  pooled connection        : {pooled:.3f} s ({pooled / count * 1e6:.0f} us per query)")
+
+
+if __name__ == "__main__":
+    benchmark()
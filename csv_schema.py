@@ -0,0 +1,101 @@
+# Column types of the lesson CSV files, for pandas.read_csv
+# Without them read_csv guesses: every id and quantity becomes int64, every text
+# column a Python object per row, postal codes lose their leading zeros, and dates stay strings.
+# Usage from a script in a sub folder:
+#   sys.path.insert(0, "..")  (the repository root)
+#   import csv_schema
+#   products = csv_schema.read_csv("products", csv_dir="../csv")
+# Run `python csv_schema.py` from the repository root for the memory report.
+import os
+
+# table -> {column: dtype}. Only these columns are read (usecols), in CSV order.
+# Prices stay float64: float32 can't hold most cent amounts exactly (513.49 would
+# become 513.489990234375), and the loaders write these values to the database.
+schemas = {
+    "customers": {
+        "customer_id": "int32",
+        "customer_name": "object",
+        "contact": "object",
+        "street": "object",
+        # city and country stay object: customers.csv has 100 cities and 87 countries
+        # in 100 rows, and a category only saves memory when values repeat a lot
+        "city": "object",
+        "country": "object",
+        "postal_code": "object",  # text: keeps leading zeros
+        "phone": "object",
+    },
+    "employees": {
+        "employee_id": "int32",
+        "first_name": "object",
+        "last_name": "object",
+        "phone": "object",
+    },
+    "products": {
+        "product_id": "int32",
+        "product_name": "object",
+        "price": "float64",
+    },
+    "orders": {
+        "order_id": "int32",
+        "date": "object",  # parsed by read_csv, see date_columns
+        "customer_id": "int32",
+        "employee_id": "int32",
+    },
+    "line_items": {
+        "line_item_id": "int32",
+        "order_id": "int32",
+        "product_id": "int32",
+        "quantity": "int16",
+    },
+}
+
+# columns read_csv turns into datetime64 (with parse_dates=True)
+date_columns = {
+    "orders": ["date"],
+}
+
+
+def read_csv(table, csv_dir="./csv", columns=None, parse_dates=True, **kwargs):
+    """
+    pandas.read_csv of csv_dir/<table>.csv with the dtypes of schemas[table].
+    columns picks a subset of the schema's columns (default: all of them).
+    parse_dates=False keeps date columns as text, e.g. when the frame goes
+    back into SQLite, which stores dates as 'YYYY-MM-DD' strings.
+    Other keyword arguments (chunksize, ...) go to read_csv.
+    """
+    import pandas as pd
+
+    schema = schemas[table]
+    columns = list(schema) if columns is None else columns
+    dtype = {column: schema[column] for column in columns}
+    dates = [column for column in date_columns.get(table, []) if column in columns]
+    if parse_dates:
+        for column in dates:
+            del dtype[column]
+    return pd.read_csv(os.path.join(csv_dir, table + ".csv"), usecols=columns, dtype=dtype,
+                       parse_dates=dates if parse_dates else False, **kwargs)
+
+
+def memory_report(csv_dir="./csv"):
+    """Print the in-memory size of every table read with default inference vs with the schema."""
+    import pandas as pd
+
+    print(f"{'Table':12} | {'rows':>6} | {'default':>10} | {'schema':>10} | {'saved':>6}")
+    print("-" * 58)
+    totals = [0, 0]
+    for table in schemas:
+        default = pd.read_csv(os.path.join(csv_dir, table + ".csv"))
+        typed = read_csv(table, csv_dir)
+        before = default.memory_usage(deep=True).sum()
+        after = typed.memory_usage(deep=True).sum()
+        totals[0] += before
+        totals[1] += after
+        print(f"{table:12} | {len(typed):6} | {before / 1024:8.1f}KB | {after / 1024:8.1f}KB | "
+              f"{1 - after / before:6.1%}")
+    print("-" * 58)
+    print(f"{'total':12} | {'':6} | {totals[0] / 1024:8.1f}KB | {totals[1] / 1024:8.1f}KB | "
+          f"{1 - totals[1] / totals[0]:6.1%}")
+
+
+if __name__ == "__main__":
+    memory_report()
@@ -0,0 +1,76 @@
+# Run from the repository root: python -m pytest -q load_db-test.py
+import sqlite3
+
+import pytest
+
+import load_db
+
+# a full recompute of order_totals, to compare the trigger-maintained table against
+recompute = """
+    SELECT o.order_id, o.customer_id, ROUND(SUM(p.price * li.quantity), 6), COUNT(*)
+    FROM orders o
+    JOIN line_items li ON li.order_id = o.order_id
+    JOIN products p ON p.product_id = li.product_id
+    GROUP BY o.order_id
+    ORDER BY o.order_id
+"""
+
+
+def make_database(path):
+    conn = sqlite3.connect(str(path))
+    load_db.create_tables(conn.cursor())
+    conn.executemany("INSERT INTO customers (customer_id, customer_name) VALUES (?, ?)",
+                     [(1, "Ann"), (2, "Bob"), (3, "Cy")])
+    conn.executemany("INSERT INTO products (product_id, product_name, price) VALUES (?, ?, ?)",
+                     [(1, "pen", 1.25), (2, "ink", 7.5), (3, "pad", 3.1)])
+    conn.executemany("INSERT INTO orders (order_id, customer_id, employee_id, date) VALUES (?, ?, 1, '2024-01-01')",
+                     [(1, 1), (2, 1), (3, 2), (4, 3)])
+    conn.executemany("INSERT INTO line_items (line_item_id, order_id, product_id, quantity) VALUES (?, ?, ?, ?)",
+                     [(1, 1, 1, 2), (2, 1, 2, 1), (3, 2, 3, 5), (4, 3, 1, 10), (5, 3, 3, 1), (6, 4, 2, 4)])
+    conn.commit()
+    load_db.create_order_totals(conn)
+    return conn
+
+
+def order_totals(conn):
+    return conn.execute("SELECT order_id, customer_id, ROUND(total_price, 6), line_count "
+                        "FROM order_totals ORDER BY order_id").fetchall()
+
+
+mutations = {
+    "price": ["UPDATE products SET price = 2.0 WHERE product_id = 1"],
+    "quantity": ["UPDATE line_items SET quantity = 7 WHERE line_item_id = 3"],
+    "move line item": ["UPDATE line_items SET order_id = 4 WHERE line_item_id = 2"],
+    "delete an order's items": ["DELETE FROM line_items WHERE order_id = 3"],
+    "order customer": ["UPDATE orders SET customer_id = 3 WHERE order_id = 2"],
+    "change product": ["UPDATE line_items SET product_id = 2 WHERE line_item_id = 4"],
+    "insert line item": ["INSERT INTO line_items (order_id, product_id, quantity) VALUES (2, 1, 3)"],
+    "delete and re-add product": ["DELETE FROM products WHERE product_id = 3",
+                                  "INSERT INTO products (product_id, product_name, price) VALUES (3, 'pad', 4.0)"],
+    "delete order": ["DELETE FROM orders WHERE order_id = 1"],
+}
+
+
+def test_order_totals_after_load(tmp_path):
+    conn = make_database(tmp_path / "test.db")
+    assert order_totals(conn) == conn.execute(recompute).fetchall()
+    assert order_totals(conn)[0] == (1, 1, 10.0, 2)
+
+
+@pytest.mark.parametrize("name", list(mutations))
+def test_order_totals_triggers(tmp_path, name):
+    conn = make_database(tmp_path / "test.db")
+    before = order_totals(conn)
+    for statement in mutations[name]:
+        conn.execute(statement)
+    conn.commit()
+    assert order_totals(conn) == conn.execute(recompute).fetchall()
+    assert order_totals(conn) != before or name == "delete and re-add product"
+
+
+def test_reopening_keeps_the_totals(tmp_path):
+    conn = make_database(tmp_path / "test.db")
+    conn.execute("UPDATE line_items SET quantity = 1 WHERE line_item_id = 1")
+    conn.commit()
+    load_db.create_order_totals(conn, rebuild=False)  # what the incremental load does
+    assert order_totals(conn) == conn.execute(recompute).fetchall()
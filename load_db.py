@@ -1,24 +1,51 @@
-import pandas as pd
-import sqlalchemy as sa
+import argparse
+import csv
+import hashlib
+import io
 import sqlite3
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import csv_schema
 db_path = "./db/lesson.db"
 
-if os.path.exists(db_path):
-    answer = input("The database exists.  Do you want to recreate it (y/n)?")
-    if answer.lower() != 'y':
-        exit(0)
-    os.remove(db_path)
+tables = ["customers", "employees",
+          "products", "orders", "line_items"]
 
-with sqlite3.connect("./db/lesson.db",isolation_level='IMMEDIATE') as conn:    
-    conn = sqlite3.connect("./db/lesson.db",isolation_level='IMMEDIATE')
-    conn.execute("PRAGMA foreign_keys = 1")
-    cursor = conn.cursor()
+# primary key of each table, used as the high-water mark for incremental loads
+primary_keys = {
+    "customers": "customer_id",
+    "employees": "employee_id",
+    "products": "product_id",
+    "orders": "order_id",
+    "line_items": "line_item_id",
+}
+
+# tables that only ever get new rows; an incremental load appends rows past the high-water mark
+append_only_tables = ["orders", "line_items"]
+
+# secondary indexes, created after the data is in: table -> column lists.
+# They cover the access paths of assignment9/advanced_sql.py: the line_items ones carry
+# every line_items column the joins read, and the orders ones get order_id for free
+# (it is the rowid), so those joins never have to touch the table itself.
+indexes = {
+    "orders": [["customer_id"], ["employee_id"]],
+    "line_items": [["order_id", "product_id", "quantity"], ["product_id", "order_id", "quantity"]],
+    "customers": [["customer_name"]],
+    "employees": [["last_name", "first_name"]],
+    "products": [["price"]],
+}
+
+
+def create_tables(cursor):
     # customer_name,contact,street,city,country,postal_code,phone
     # Create tables
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS customers (
-        customer_id INTEGER PRIMARY KEY,          
+        customer_id INTEGER PRIMARY KEY,
         customer_name TEXT,
         contact TEXT,
         street TEXT,
@@ -33,7 +60,7 @@ with sqlite3.connect("./db/lesson.db",isolation_level='IMMEDIATE') as conn:
         employee_id INTEGER PRIMARY KEY,
         first_name TEXT,
         last_name TEXT,
-        phone TEXT      
+        phone TEXT
     )
     """)
     cursor.execute("""
@@ -63,15 +90,409 @@ with sqlite3.connect("./db/lesson.db",isolation_level='IMMEDIATE') as conn:
         FOREIGN KEY(employee_id) REFERENCES employees(employee_id)
     )
     """)
- 
-# Create a database engine
-engine = sa.create_engine('sqlite:///db/lesson.db')
+    # one row per table: which CSV file went in, and how far the load got
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS load_metadata (
+        table_name TEXT PRIMARY KEY,
+        file_size INTEGER,
+        file_mtime REAL,
+        file_hash TEXT,
+        max_pk INTEGER,
+        row_count INTEGER,
+        status TEXT
+    )
+    """)
 
-tables = ["customers", "employees", 
-          "products", "orders", "line_items"]
 
-for table in tables:
-    t_name = table.lower()
-    csv_file = "./csv/" + table + ".csv"
-    data = pd.read_csv(csv_file, sep=',')
-    data.to_sql(t_name, engine, if_exists='append', index=False)
+def file_fingerprint(csv_file):
+    """(size, mtime, sha256) of a CSV file."""
+    stat = os.stat(csv_file)
+    digest = hashlib.sha256()
+    with open(csv_file, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return stat.st_size, stat.st_mtime, digest.hexdigest()
+
+
+def get_load_state(conn, table):
+    """The load_metadata row of a table as a dict, or None if it was never loaded."""
+    cursor = conn.execute(
+        "SELECT file_size, file_mtime, file_hash, max_pk, row_count, status "
+        "FROM load_metadata WHERE table_name = ?", (table,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip(["file_size", "file_mtime", "file_hash", "max_pk", "row_count", "status"], row))
+
+
+def save_load_state(conn, table, fingerprint, status):
+    """Record the file fingerprint, high-water mark and status of a table (not committed)."""
+    pk = primary_keys[table]
+    max_pk, row_count = conn.execute(f"SELECT MAX({pk}), COUNT(*) FROM {table}").fetchone()
+    size, mtime, file_hash = fingerprint
+    conn.execute("""
+        INSERT OR REPLACE INTO load_metadata
+            (table_name, file_size, file_mtime, file_hash, max_pk, row_count, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (table, size, mtime, file_hash, max_pk, row_count, status))
+
+
+def index_name(table, columns):
+    return f"idx_{table}_{'_'.join(columns)}"
+
+
+def create_indexes(conn):
+    for table, column_lists in indexes.items():
+        for columns in column_lists:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name(table, columns)} "
+                         f"ON {table}({', '.join(columns)})")
+    conn.execute("ANALYZE")  # give the query planner row counts for the new indexes
+    conn.commit()
+
+
+def order_totals_refresh(orders):
+    """
+    SQL that recomputes the order_totals rows of the orders selected by `orders`
+    (an SQL expression usable after IN). Orders whose line items all point at
+    missing products get no row, the same as the inner joins in advanced_sql.py.
+    """
+    return f"""
+        DELETE FROM order_totals WHERE order_id IN {orders};
+        INSERT INTO order_totals (order_id, customer_id, total_price, line_count)
+        SELECT o.order_id, o.customer_id, SUM(p.price * li.quantity), COUNT(*)
+        FROM orders o
+        JOIN line_items li ON li.order_id = o.order_id
+        JOIN products p ON p.product_id = li.product_id
+        WHERE o.order_id IN {orders}
+        GROUP BY o.order_id;
+    """
+
+
+# triggers that keep order_totals in step with line_items, products and orders.
+# Each one recomputes only the orders the changed row belongs to.
+order_totals_triggers = {
+    "trg_order_totals_li_insert": "AFTER INSERT ON line_items",
+    "trg_order_totals_li_delete": "AFTER DELETE ON line_items",
+    "trg_order_totals_li_update": "AFTER UPDATE OF order_id, product_id, quantity ON line_items",
+    "trg_order_totals_price_update": "AFTER UPDATE OF price ON products",
+    "trg_order_totals_product_insert": "AFTER INSERT ON products",
+    "trg_order_totals_product_delete": "AFTER DELETE ON products",
+    "trg_order_totals_order_update": "AFTER UPDATE OF customer_id ON orders",
+    "trg_order_totals_order_delete": "AFTER DELETE ON orders",
+}
+order_totals_trigger_bodies = {
+    "trg_order_totals_li_insert": order_totals_refresh("(NEW.order_id)"),
+    "trg_order_totals_li_delete": order_totals_refresh("(OLD.order_id)"),
+    "trg_order_totals_li_update": order_totals_refresh("(OLD.order_id, NEW.order_id)"),
+    "trg_order_totals_price_update": order_totals_refresh(
+        "(SELECT order_id FROM line_items WHERE product_id = NEW.product_id)"),
+    "trg_order_totals_product_insert": order_totals_refresh(
+        "(SELECT order_id FROM line_items WHERE product_id = NEW.product_id)"),
+    "trg_order_totals_product_delete": order_totals_refresh(
+        "(SELECT order_id FROM line_items WHERE product_id = OLD.product_id)"),
+    "trg_order_totals_order_update":
+        "UPDATE order_totals SET customer_id = NEW.customer_id WHERE order_id = NEW.order_id;",
+    "trg_order_totals_order_delete": "DELETE FROM order_totals WHERE order_id = OLD.order_id;",
+}
+
+
+def create_order_totals(conn, rebuild=True):
+    """
+    Create the order_totals table: SUM(price * quantity) of every order, kept up to
+    date by triggers so reports read it instead of joining all line items.
+    With rebuild=True (after a bulk load, which runs before the triggers exist)
+    the table is refilled from scratch; otherwise only a new table is filled.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'order_totals'").fetchone()
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS order_totals (
+        order_id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        total_price REAL NOT NULL,
+        line_count INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_order_totals_customer_id_total_price "
+                 "ON order_totals(customer_id, total_price)")
+    if rebuild or not exists:
+        conn.executescript("BEGIN;" + order_totals_refresh("(SELECT order_id FROM orders)") + "COMMIT;")
+    for name, event in order_totals_triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} "
+                     f"BEGIN {order_totals_trigger_bodies[name]} END")
+    conn.commit()
+
+
+def load_pandas(tables):
+    """The original loader: pandas read_csv (with the csv_schema.py dtypes) + DataFrame.to_sql through SQLAlchemy."""
+    import sqlalchemy as sa
+
+    # Create a database engine
+    engine = sa.create_engine('sqlite:///db/lesson.db')
+
+    for table in tables:
+        t_name = table.lower()
+        # dates stay text: SQLite keeps them as 'YYYY-MM-DD' strings
+        data = csv_schema.read_csv(table, "./csv", parse_dates=False)
+        data.to_sql(t_name, engine, if_exists='append', index=False)
+
+
+def read_csv_rows(csv_file):
+    """Return (header, row iterator) for a CSV file. Empty cells become NULL, like pandas does."""
+    f = open(csv_file, newline="")
+    reader = csv.reader(f)
+    header = next(reader)
+
+    def rows():
+        with f:
+            for row in reader:
+                yield [value if value != "" else None for value in row]
+
+    return header, rows()
+
+
+def csv_chunk_offsets(csv_file, chunk_bytes):
+    """
+    Return (header, byte ranges) for a CSV file: the data lines split into
+    (start, end) ranges of about chunk_bytes, each ending at a line end.
+    """
+    with open(csv_file, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        start = f.tell()
+        while start < size:
+            if start + chunk_bytes >= size:
+                end = size
+            else:
+                f.seek(start + chunk_bytes - 1)
+                f.readline()  # on to the end of that line
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def parse_csv_chunk(csv_file, start, end, columns):
+    """
+    Parse one byte range of a CSV file in a worker process. Returns (rows, parse seconds).
+    Ranges are cut at line ends, so a quoted field with a newline in it can't be
+    split this way; that shows up as a row with the wrong number of fields.
+    """
+    parse_start = time.perf_counter()
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode("utf-8")
+    rows = []
+    for row in csv.reader(io.StringIO(data, newline="")):
+        if not row:
+            continue
+        if len(row) != columns:
+            raise ValueError(f"{csv_file}: a row in bytes {start}-{end} has {len(row)} fields, "
+                             f"not {columns} (a newline inside a quoted field?)")
+        rows.append([value if value != "" else None for value in row])
+    return rows, time.perf_counter() - parse_start
+
+
+def parsed_rows(executor, csv_file, ranges, columns, max_in_flight, stats):
+    """
+    Yield the rows of a CSV file parsed chunk by chunk in the process pool, in file order.
+    At most max_in_flight chunks are submitted and not yet written, and each chunk
+    is dropped once its rows are taken, so memory stays at a few chunks.
+    Adds the workers' parse time and the time spent waiting for them to stats.
+    """
+    pending = deque()
+    ranges = iter(ranges)
+    while True:
+        while len(pending) < max_in_flight:
+            chunk = next(ranges, None)
+            if chunk is None:
+                break
+            pending.append(executor.submit(parse_csv_chunk, csv_file, *chunk, columns))
+        if not pending:
+            return
+        wait_start = time.perf_counter()
+        rows, parse_seconds = pending.popleft().result()
+        stats["wait"] += time.perf_counter() - wait_start
+        stats["parse"] += parse_seconds
+        yield from rows
+
+
+def insert_rows(conn, table, header, rows, batch_size=100_000, verb="INSERT"):
+    """
+    executemany the rows into table, one transaction per batch_size rows. Returns the row count.
+    verb can be "INSERT OR REPLACE" to overwrite rows that are already there.
+    """
+    columns = ", ".join(header)
+    placeholders = ", ".join("?" for _ in header)
+    sql = f"{verb} INTO {table} ({columns}) VALUES ({placeholders})"
+    count = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return count
+        conn.executemany(sql, batch)
+        conn.commit()
+        count += len(batch)
+
+
+def load_fast(conn, tables, batch_size=100_000, workers=0, chunk_bytes=1024 * 1024):
+    """
+    Bulk load with raw sqlite3: executemany in large transactions, WAL journal and
+    synchronous=OFF while loading, secondary indexes created at the end.
+    Foreign keys are not enforced while loading, same as the pandas loader
+    (the sample line_items refer to a product that doesn't exist).
+    Each file is streamed and parsed in this process (workers=0, the default),
+    or cut into chunk_bytes pieces parsed in a process pool of `workers`
+    processes (None: one per CPU) with at most 2 * workers chunks in flight.
+    Either way only a few batches are in memory at a time, and this connection
+    writes the tables one by one in the order given, so parents
+    (customers/employees/products) go in before orders and line_items.
+    Prints rows/sec for every table.
+    """
+    conn.execute("PRAGMA foreign_keys = 0")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    executor = None
+    try:
+        total_start = time.perf_counter()
+        if workers != 0:
+            workers = workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=workers)
+            max_in_flight = 2 * workers
+
+        for table in tables:
+            start = time.perf_counter()
+            csv_file = "./csv/" + table + ".csv"
+            if executor is not None:
+                stats = {"parse": 0.0, "wait": 0.0}
+                header, ranges = csv_chunk_offsets(csv_file, chunk_bytes)
+                rows = parsed_rows(executor, csv_file, ranges, len(header), max_in_flight, stats)
+            else:
+                header, rows = read_csv_rows(csv_file)
+            count = insert_rows(conn, table.lower(), header, rows, batch_size)
+            save_load_state(conn, table, file_fingerprint("./csv/" + table + ".csv"), "done")
+            conn.commit()
+            seconds = time.perf_counter() - start
+            rate = count / seconds if seconds else float("inf")
+            line = f"{table}: {count} rows in {seconds:.3f} s ({rate:,.0f} rows/sec)"
+            if executor is not None:
+                line += f", parse {stats['parse']:.3f} s, waited {stats['wait']:.3f} s"
+            print(line)
+
+        start = time.perf_counter()
+        create_indexes(conn)
+        print(f"indexes: {time.perf_counter() - start:.3f} s")
+
+        start = time.perf_counter()
+        create_order_totals(conn)
+        print(f"order_totals: {time.perf_counter() - start:.3f} s")
+        print(f"total: {time.perf_counter() - total_start:.3f} s")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # back to the normal, durable settings
+        conn.rollback()
+        conn.execute("PRAGMA foreign_keys = 1")
+        conn.execute("PRAGMA synchronous = FULL")
+        conn.execute("PRAGMA journal_mode = DELETE")
+
+
+def load_incremental(conn, tables, batch_size=100_000):
+    """
+    Bring an existing database up to date with the CSV files instead of rebuilding it.
+    For every table, the file's size, mtime and sha256 are compared with load_metadata:
+      - unchanged and fully loaded: skipped
+      - orders / line_items: only rows past the highest primary key are appended
+      - other tables: all rows are upserted (INSERT OR REPLACE)
+    Batches are committed as they go and a table is marked "done" only at the end,
+    so after a failure the next run picks up where it stopped.
+    """
+    conn.execute("PRAGMA foreign_keys = 0")
+    try:
+        for table in tables:
+            start = time.perf_counter()
+            csv_file = "./csv/" + table + ".csv"
+            state = get_load_state(conn, table)
+
+            stat = os.stat(csv_file)
+            if (state and state["status"] == "done" and state["file_size"] == stat.st_size
+                    and state["file_mtime"] == stat.st_mtime):
+                print(f"{table}: unchanged, skipped")
+                continue
+
+            fingerprint = file_fingerprint(csv_file)
+            if state and state["status"] == "done" and state["file_hash"] == fingerprint[2]:
+                # touched but same content: just remember the new mtime
+                save_load_state(conn, table, fingerprint, "done")
+                conn.commit()
+                print(f"{table}: unchanged, skipped")
+                continue
+
+            save_load_state(conn, table, fingerprint, "loading")
+            conn.commit()
+
+            header, rows = read_csv_rows(csv_file)
+            if table in append_only_tables:
+                pk_pos = header.index(primary_keys[table])
+                # the table itself is the high-water mark, so half-loaded tables resume correctly
+                high_water = conn.execute(f"SELECT MAX({primary_keys[table]}) FROM {table}").fetchone()[0]
+                if high_water is not None:
+                    rows = (row for row in rows if int(row[pk_pos]) > high_water)
+                count = insert_rows(conn, table, header, rows, batch_size)
+                action = "appended"
+            else:
+                count = insert_rows(conn, table, header, rows, batch_size, verb="INSERT OR REPLACE")
+                action = "upserted"
+
+            save_load_state(conn, table, fingerprint, "done")
+            conn.commit()
+            seconds = time.perf_counter() - start
+            print(f"{table}: {count} rows {action} in {seconds:.3f} s")
+
+        # adds indexes an older database is missing and refreshes the ANALYZE stats
+        create_indexes(conn)
+        # the triggers already kept order_totals up to date with the rows added above
+        create_order_totals(conn, rebuild=False)
+    finally:
+        conn.rollback()
+        conn.execute("PRAGMA foreign_keys = 1")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create ./db/lesson.db from the CSV files.")
+    parser.add_argument("--pandas", action="store_true",
+                        help="use the original pandas/SQLAlchemy loader instead of the fast one")
+    parser.add_argument("--batch-size", type=int, default=100_000,
+                        help="rows per transaction in the fast loader")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes parsing CSV chunks in the fast loader "
+                             "(default 0: stream each file in the writer process)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="update an existing database from changed CSV files instead of recreating it")
+    args = parser.parse_args()
+
+    if args.incremental:
+        conn = sqlite3.connect(db_path, isolation_level='IMMEDIATE')
+        create_tables(conn.cursor())
+        load_incremental(conn, tables, args.batch_size)
+        conn.close()
+        exit(0)
+
+    if os.path.exists(db_path):
+        answer = input("The database exists.  Do you want to recreate it (y/n)?")
+        if answer.lower() != 'y':
+            exit(0)
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path, isolation_level='IMMEDIATE')
+    conn.execute("PRAGMA foreign_keys = 1")
+    create_tables(conn.cursor())
+
+    if args.pandas:
+        load_pandas(tables)
+        create_indexes(conn)
+        create_order_totals(conn)
+    else:
+        load_fast(conn, tables, args.batch_size, args.workers)
+    conn.close()
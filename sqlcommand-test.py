@@ -0,0 +1,78 @@
+# Run from the repository root: python -m pytest -q sqlcommand-test.py
+import io
+
+import connection_pool
+import sqlcommand
+
+
+def use_database(monkeypatch, path):
+    conn = connection_pool.connect(str(path), isolation_level='IMMEDIATE')
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)")
+    conn.commit()
+    monkeypatch.setattr(sqlcommand, "conn", conn)
+    monkeypatch.setattr(sqlcommand, "cursor", conn.cursor())
+    monkeypatch.setattr(sqlcommand, "settings", dict(sqlcommand.settings, autocommit=True, explicit=False))
+    return conn
+
+
+def test_failed_begin_keeps_batched_writes(monkeypatch, tmp_path):
+    conn = use_database(monkeypatch, tmp_path / "test.db")
+    sqlcommand.settings["autocommit"] = False
+    statements = io.StringIO(
+        "INSERT INTO notes (text) VALUES ('one');\n"
+        "BEGIN;\n"  # fails: the batched writes already opened a transaction
+        "INSERT INTO notes (text) VALUES ('two');\n")
+    assert sqlcommand.run_batch(statements) == 1
+    assert sqlcommand.settings["explicit"] is False
+    assert not conn.in_transaction  # committed at the end, not rolled back
+    assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 2
+
+
+def test_begin_is_left_open_until_commit(monkeypatch, tmp_path):
+    conn = use_database(monkeypatch, tmp_path / "test.db")
+    statements = io.StringIO(
+        "BEGIN;\n"
+        "INSERT INTO notes (text) VALUES ('one');\n")
+    assert sqlcommand.run_batch(statements) == 0
+    # no COMMIT: the user's transaction is rolled back on exit
+    assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 0
+
+
+def test_begin_after_a_comment(monkeypatch, tmp_path):
+    conn = use_database(monkeypatch, tmp_path / "test.db")
+    statements = io.StringIO(
+        "-- load notes\n"
+        "/* block\n   comment */ BEGIN;\n"
+        "INSERT INTO notes (text) VALUES ('one');\n"
+        "ROLLBACK;\n")
+    assert sqlcommand.run_batch(statements) == 0
+    assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 0
+
+
+def test_statement_keyword():
+    assert sqlcommand.statement_keyword("-- a\n-- b\n  begin;") == "BEGIN"
+    assert sqlcommand.statement_keyword("/* x */ SAVEPOINT s;") == "SAVEPOINT"
+    assert sqlcommand.statement_keyword("-- only a comment") == ""
+
+
+def test_read_statements_splits_lines():
+    statements = io.StringIO(
+        "BEGIN; INSERT INTO notes (text) VALUES ('a;b');\n"
+        "CREATE TRIGGER t AFTER INSERT ON notes BEGIN\n"
+        "  UPDATE notes SET text = 'x' WHERE id = NEW.id; END; COMMIT;\n"
+        "SELECT 1")
+    assert list(sqlcommand.read_statements(statements)) == [
+        "BEGIN;",
+        "INSERT INTO notes (text) VALUES ('a;b');",
+        "CREATE TRIGGER t AFTER INSERT ON notes BEGIN\n"
+        "  UPDATE notes SET text = 'x' WHERE id = NEW.id; END;",
+        "COMMIT;",
+        "SELECT 1",
+    ]
+
+
+def test_two_statements_on_one_line(monkeypatch, tmp_path):
+    conn = use_database(monkeypatch, tmp_path / "test.db")
+    statements = io.StringIO("BEGIN; INSERT INTO notes (text) VALUES ('one'); COMMIT;\n")
+    assert sqlcommand.run_batch(statements) == 0
+    assert conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0] == 1
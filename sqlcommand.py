@@ -1,24 +1,269 @@
+import argparse
+import csv
+import json
 import readline  # Provides command line editing and history
 import sqlite3   # For SQL command execution
 import sys
-conn = sqlite3.connect("./db/lesson.db",isolation_level='IMMEDIATE')
-conn.execute("PRAGMA foreign_keys = 1")
+import time
+import connection_pool
+db_path = "./db/lesson.db"
 
+
+def connect(cached_statements=128):
+    """
+    Open the shell's connection. cached_statements is the size of sqlite3's
+    prepared statement cache: statements whose text repeats are not re-prepared.
+    """
+    return connection_pool.connect(db_path, isolation_level='IMMEDIATE',
+                                   cached_statements=cached_statements)
+
+
+conn = connect()
 cursor = conn.cursor()
 
+# switched with the .timer / .profile / .autocommit dot-commands
+# "explicit" is True while a transaction the user opened with BEGIN/SAVEPOINT is running
+settings = {"timer": False, "profile": False, "cached_statements": 128,
+            "autocommit": True, "explicit": False}
+
+DOT_HELP = """Dot-commands (no semicolon needed):
+  .timer on|off      show wall time and row count of every statement
+  .profile on|off    show SQLite VM steps, full scans and temp sorts of every statement
+  .plan STATEMENT    show EXPLAIN QUERY PLAN for STATEMENT without running it
+  .cache N           size of the prepared statement cache (0 turns it off)
+  .autocommit on|off off: keep writes in one transaction until COMMIT; or .autocommit on
+  .help              show this help"""
+
+
+def print_tables():
+    tables = cursor.execute("SELECT name FROM sqlite_schema WHERE type='table' ORDER BY 'name'").fetchall()
+    print("The tables in this database are:")
+    for row in tables:
+        print(row[0])
+    print("Enter SQL statements below, ending with a semicolon.  Or, type exit to quit.")
+
+
+def read_statements(f):
+    """Yield complete SQL statements from a file, however they are split across lines."""
+    buffer = ""
+    for line in f:
+        start = len(buffer)
+        buffer += line
+        # a line can hold several statements (BEGIN; INSERT ...;): cut at every ; that
+        # ends one. A ; inside a string or a trigger body doesn't complete the statement.
+        position = buffer.find(";", start)
+        while position != -1:
+            if sqlite3.complete_statement(buffer[:position + 1]):
+                yield buffer[:position + 1].strip()
+                buffer = buffer[position + 1:]
+                position = buffer.find(";")
+            else:
+                position = buffer.find(";", position + 1)
+    if buffer.strip():
+        yield buffer.strip()  # last statement without a semicolon
+
+
+def write_results(cursor, out, fmt, fetch_size):
+    """Stream the rows of the last statement to out with fetchmany. Returns the row count."""
+    if cursor.description is None:
+        return 0  # not a query
+    names = [column[0] for column in cursor.description]
+    if fmt == "jsonl":
+        def write_row(row):
+            out.write(json.dumps(dict(zip(names, row)), default=str) + "\n")
+    else:
+        writer = csv.writer(out, delimiter="\t" if fmt == "tsv" else ",")
+        writer.writerow(names)
+        write_row = writer.writerow
+
+    count = 0
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return count
+        for row in rows:
+            write_row(row)
+        count += len(rows)
+
+
+def run_batch(f, fmt="csv", fetch_size=1000, timing=False, buffer_size=1024 * 1024):
+    """
+    Run every statement in f (a .sql file or stdin) and write the results to stdout
+    as CSV, TSV or JSON lines. Rows are fetched fetch_size at a time, so memory
+    stays flat no matter how big a SELECT is. Errors and timings go to stderr.
+    Returns the number of failed statements.
+    """
+    errors = 0
+    # our own buffer on stdout, instead of a write() per row
+    with open(sys.stdout.fileno(), "w", buffering=buffer_size, newline="", closefd=False) as out:
+        for number, statement in enumerate(read_statements(f), start=1):
+            start = time.perf_counter()
+            changes_before = conn.total_changes
+            try:
+                cursor.execute(statement)
+                count = write_results(cursor, out, fmt, fetch_size)
+            except sqlite3.Error as e:
+                errors += 1
+                out.flush()
+                print(f"SQL Error in statement {number}: {e}", file=sys.stderr)
+                finish_statement(statement, changes_before, succeeded=False)
+                continue
+
+            # Commit changes if it’s an INSERT, UPDATE, or DELETE
+            finish_statement(statement, changes_before)
+
+            if timing:
+                out.flush()  # keep the timing lines next to their results
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"-- statement {number}: {elapsed:.3f} ms, {count} rows", file=sys.stderr)
+        close_transaction()
+    return errors
+
+
+def statement_keyword(statement):
+    """The first keyword of a statement (upper case), after any leading -- and /* */ comments."""
+    text = statement.lstrip()
+    while text.startswith(("--", "/*")):
+        if text.startswith("--"):
+            end = text.find("\n")
+            text = "" if end == -1 else text[end + 1:]
+        else:
+            end = text.find("*/")
+            text = "" if end == -1 else text[end + 2:]
+        text = text.lstrip()
+    return text.split(None, 1)[0].upper().rstrip(";") if text else ""
+
+
+def finish_statement(statement, changes_before, succeeded=True):
+    """
+    Decide what happens to the transaction after a statement.
+    Read-only statements never open one (only INSERT/UPDATE/DELETE/REPLACE take the
+    write lock), so there is nothing to commit for them. A transaction the user
+    opened with BEGIN or SAVEPOINT is left alone until they COMMIT or ROLLBACK,
+    and with autocommit off writes pile up in one transaction. Otherwise the
+    write is committed, or just rolled back if it didn't change any rows.
+    succeeded is False if the statement raised: a failed BEGIN (e.g. "cannot
+    start a transaction within a transaction") doesn't make the open
+    transaction the user's.
+    """
+    keyword = statement_keyword(statement)
+    if not conn.in_transaction:
+        settings["explicit"] = False  # COMMIT / ROLLBACK / END, or nothing was written
+        return
+    if keyword in ("BEGIN", "SAVEPOINT") and succeeded:
+        settings["explicit"] = True
+    if settings["explicit"] or not settings["autocommit"]:
+        return
+    if conn.total_changes != changes_before:
+        conn.commit()
+    else:
+        conn.rollback()  # nothing changed: release the lock without a journal sync
+
+
+def close_transaction():
+    """On exit: commit batched autocommit-off writes, roll back an unfinished BEGIN."""
+    if not conn.in_transaction:
+        return
+    if settings["explicit"]:
+        conn.rollback()
+        print("Open transaction rolled back (no COMMIT).", file=sys.stderr)
+    else:
+        conn.commit()
+
+
+def query_plan(statement):
+    """EXPLAIN QUERY PLAN rows for statement, as (id, parent, detail) tuples."""
+    return [(row[0], row[1], row[3]) for row in
+            conn.execute("EXPLAIN QUERY PLAN " + statement.rstrip().rstrip(";")).fetchall()]
+
+
+def print_plan(statement):
+    plan = query_plan(statement)
+    depth = {0: 0}
+    for node_id, parent, detail in plan:
+        depth[node_id] = depth.get(parent, 0) + 1
+        print("  " * depth[node_id] + detail)
+
+
+def plan_counts(statement):
+    """(full table scans, temp b-tree sorts) in the query plan of statement."""
+    try:
+        details = [detail for _, _, detail in query_plan(statement)]
+    except sqlite3.Error:
+        return 0, 0
+    # a SCAN reads a whole table (or a whole index), unlike a SEARCH
+    scans = sum(1 for d in details if d.startswith("SCAN") and d != "SCAN CONSTANT ROW")
+    sorts = sum(1 for d in details if "USE TEMP B-TREE" in d)
+    return scans, sorts
+
+
+def run_statement(statement):
+    """Execute one statement from the prompt, print its rows and the .timer/.profile stats."""
+    steps = [0]
+    if settings["profile"]:
+        def count_step():
+            steps[0] += 1
+            return 0  # 0 means keep going
+        # called on every VM instruction while profiling
+        conn.set_progress_handler(count_step, 1)
+
+    start = time.perf_counter()
+    try:
+        cursor.execute(statement)
+        results = cursor.fetchall()
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        conn.set_progress_handler(None, 1)
+
+    for row in results:
+        print(row)
+
+    if settings["timer"]:
+        count = len(results) if cursor.description else max(cursor.rowcount, 0)
+        print(f"Run Time: {elapsed:.3f} ms, {count} rows")
+    if settings["profile"]:
+        scans, sorts = plan_counts(statement)
+        print(f"Profile: {steps[0]} VM steps, {scans} full scans, {sorts} temp sorts")
+
+
+def dot_command(line):
+    """Handle a .command typed at the prompt."""
+    global conn, cursor
+    name, _, arg = line.strip().partition(" ")
+    arg = arg.strip()
+
+    if name in (".timer", ".profile") and arg in ("on", "off"):
+        settings[name[1:]] = arg == "on"
+    elif name == ".autocommit" and arg in ("on", "off"):
+        settings["autocommit"] = arg == "on"
+        if settings["autocommit"] and conn.in_transaction and not settings["explicit"]:
+            conn.commit()  # flush the writes batched while it was off
+    elif name == ".plan" and arg:
+        try:
+            print_plan(arg)
+        except sqlite3.Error as e:
+            print(f"SQL Error: {e}")
+    elif name == ".cache" and arg.isdigit():
+        if conn.in_transaction:
+            print("Finish the open transaction first (COMMIT or ROLLBACK).")
+            return
+        # the cache size is fixed when connecting, so reconnect
+        conn.close()
+        settings["cached_statements"] = int(arg)
+        conn = connect(settings["cached_statements"])
+        cursor = conn.cursor()
+        print(f"Statement cache size: {arg}")
+    else:
+        print(DOT_HELP)
 
-tables = cursor.execute("SELECT name FROM sqlite_schema WHERE type='table' ORDER BY 'name'").fetchall()
-print("The tables in this database are:")
-for row in tables:
-    print(row[0])
-print("Enter SQL statements below, ending with a semicolon.  Or, type exit to quit.")
 
 def main():
+    print_tables()
     # Connect to an in-memory SQLite database (or replace with a file database)
     
     # Initialize command history and command input buffer
     command_buffer = []
-    print("Welcome to the SQL shell! Type 'exit;' to quit.")
+    print("Welcome to the SQL shell! Type 'exit;' to quit, or .help for dot-commands.")
 
     while True:
         try:
@@ -31,6 +276,11 @@ def main():
                 print("Exiting.")
                 break
 
+            # Dot-commands are one line and only allowed between statements
+            if not command_buffer and line.strip().startswith("."):
+                dot_command(line)
+                continue
+
             # Add line to the command buffer
             command_buffer.append(line)
 
@@ -43,16 +293,16 @@ def main():
                 command_buffer = []
 
                 # Execute the command and handle any SQL exceptions
+                changes_before = conn.total_changes
+                succeeded = True
                 try:
-                    cursor.execute(full_command)
-                    results = cursor.fetchall()
-                    for row in results:
-                        print(row)
+                    run_statement(full_command)
                 except sqlite3.Error as e:
+                    succeeded = False
                     print(f"SQL Error: {e}")
                 
-                # Commit changes if it’s an INSERT, UPDATE, or DELETE
-                conn.commit()
+                # Commit changes if it’s an INSERT, UPDATE, or DELETE (see finish_statement)
+                finish_statement(full_command, changes_before, succeeded)
                 
         except EOFError:  # Handle Ctrl-D (EOF) gracefully
             print("\nExiting.")
@@ -62,7 +312,40 @@ def main():
             command_buffer = []  # Reset the command buffer
 
     # Clean up the database connection
+    close_transaction()
     conn.close()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SQL shell for ./db/lesson.db.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the statements in FILE (- for stdin) instead of prompting")
+    parser.add_argument("--format", choices=["csv", "tsv", "jsonl"], default="csv",
+                        help="output format for --batch")
+    parser.add_argument("--fetch-size", type=int, default=1000,
+                        help="rows fetched at a time in --batch mode")
+    parser.add_argument("--timing", action="store_true",
+                        help="print the time of every statement to stderr")
+    parser.add_argument("--cached-statements", type=int, default=128,
+                        help="size of the prepared statement cache")
+    parser.add_argument("--no-autocommit", action="store_true",
+                        help="batch all writes into one transaction, committed on COMMIT or at exit")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.cached_statements != settings["cached_statements"]:
+        conn.close()
+        settings["cached_statements"] = args.cached_statements
+        conn = connect(args.cached_statements)
+        cursor = conn.cursor()
+    settings["autocommit"] = not args.no_autocommit
+    if args.batch:
+        if args.batch == "-":
+            failed = run_batch(sys.stdin, args.format, args.fetch_size, args.timing)
+        else:
+            with open(args.batch) as f:
+                failed = run_batch(f, args.format, args.fetch_size, args.timing)
+        conn.close()
+        sys.exit(1 if failed else 0)
     main()